@@ -7,6 +7,8 @@ Backend selection:
 """
 from __future__ import annotations
 
+import atexit
+import logging
 import os
 import re
 import sqlite3
@@ -15,6 +17,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Optional
 
+logger = logging.getLogger(__name__)
+
 # ---------------------------------------------------------------------------
 # Backend detection helpers
 # ---------------------------------------------------------------------------
@@ -119,9 +123,13 @@ def get_db_path() -> Path:
 def set_db_path(path: Path) -> None:
     """Set database path (for tests)."""
     global _DB_PATH
+    # Write queued rows now rather than holding them for a DB that is no
+    # longer active.
+    flush_pending_writes()
     _DB_PATH = path
     # Invalidate any cached connections when the DB path changes (e.g. in tests)
     _sqlite_local.__dict__.clear()
+    _close_batch_conns()
 
 
 # ---------------------------------------------------------------------------
@@ -176,21 +184,33 @@ def get_connection():
     (WAL mode is enabled on first connect).  PostgreSQL creates a new
     connection each call (use pgBouncer or a pool library for production PG).
 
+    Rows queued by ``queue_run`` / ``queue_audit_log`` are written first,
+    so callers always see earlier writes.
+
     Both return objects expose the same ``.execute()`` / ``.commit()`` /
     ``.close()`` interface.  Callers should still call ``.close()`` — for
     SQLite the connection is *not* actually closed (it is kept alive in the
     thread-local); for PostgreSQL it is.
     """
+    if _run_writes.pending or _audit_writes.pending:
+        flush_pending_writes()
+    return _connect()
+
+
+def _pg_connect(url: str) -> _PgConn:
+    try:
+        import psycopg2  # noqa: PLC0415
+    except ImportError as exc:
+        raise ImportError(
+            "psycopg2-binary is required for PostgreSQL mode. "
+            "Run: pip install psycopg2-binary"
+        ) from exc
+    return _PgConn(psycopg2.connect(url))
+
+
+def _connect():
     if _is_postgres():
-        try:
-            import psycopg2  # noqa: PLC0415
-        except ImportError as exc:
-            raise ImportError(
-                "psycopg2-binary is required for PostgreSQL mode. "
-                "Run: pip install psycopg2-binary"
-            ) from exc
-        raw = psycopg2.connect(os.environ["DATABASE_URL"])
-        return _PgConn(raw)
+        return _pg_connect(os.environ["DATABASE_URL"])
 
     # --- SQLite (default) — reuse per-thread connection ---
     path = get_db_path()
@@ -212,6 +232,117 @@ def get_connection():
     return _PooledSQLiteConn(conn)
 
 
+# ---------------------------------------------------------------------------
+# Batched writes
+# ---------------------------------------------------------------------------
+# High-volume, best-effort rows (runs recorded by metrics, audit events) are
+# queued and written with one executemany + commit per batch instead of a
+# transaction per event.
+
+WRITE_BATCH_SIZE = 50
+WRITE_FLUSH_INTERVAL = 1.0
+
+
+def _write_target() -> tuple[str, Any]:
+    """The database queued rows go to: ("postgres", url) or ("sqlite", path)."""
+    if _is_postgres():
+        return "postgres", os.environ["DATABASE_URL"]
+    return "sqlite", get_db_path()
+
+
+# SQLite connections used for batch writes, one per database path. Flushes
+# run on short-lived timer threads, so the per-thread pool would open (and
+# leak) a connection on every timer flush.
+_batch_conns: dict[Path, sqlite3.Connection] = {}
+_batch_conns_lock = threading.Lock()
+
+
+def _close_batch_conns() -> None:
+    with _batch_conns_lock:
+        for conn in _batch_conns.values():
+            try:
+                conn.close()
+            except Exception:
+                pass
+        _batch_conns.clear()
+
+
+def _write_batch(target: tuple[str, Any], sql: str, rows: list[tuple]) -> None:
+    kind, where = target
+    if kind == "postgres":
+        conn = _pg_connect(where)
+        try:
+            conn.executemany(sql, rows)
+            conn.commit()
+        finally:
+            conn.close()
+        return
+
+    with _batch_conns_lock:
+        conn = _batch_conns.get(where)
+        if conn is None:
+            where.parent.mkdir(parents=True, exist_ok=True)
+            conn = _batch_conns[where] = _new_sqlite_conn(where)
+        try:
+            conn.executemany(sql, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+class _BatchedInsert:
+    """Parameter rows queued for a single INSERT statement.
+
+    Each row is queued together with the database that was active when it
+    was added, so a later path or DATABASE_URL change cannot redirect it.
+    A batch is written once ``WRITE_BATCH_SIZE`` rows are pending,
+    ``WRITE_FLUSH_INTERVAL`` seconds after the first queued row (from a
+    daemon timer), whenever a connection is handed out, and at exit.
+    """
+
+    def __init__(self, sql: str) -> None:
+        self._sql = sql
+        self._rows: dict[tuple[str, Any], list[tuple]] = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        # Serializes writes so a flush returns only after earlier rows landed.
+        self._write_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    @property
+    def pending(self) -> int:
+        return self._count
+
+    def add(self, params: tuple) -> None:
+        target = _write_target()
+        with self._lock:
+            self._rows.setdefault(target, []).append(params)
+            self._count += 1
+            flush_now = self._count >= WRITE_BATCH_SIZE
+            if not flush_now and self._timer is None:
+                self._timer = threading.Timer(WRITE_FLUSH_INTERVAL, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush_now:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all queued rows (best-effort; failures are logged)."""
+        with self._write_lock:
+            with self._lock:
+                batches, self._rows = self._rows, {}
+                self._count = 0
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            for target, rows in batches.items():
+                try:
+                    _write_batch(target, self._sql, rows)
+                except Exception as e:
+                    logger.warning("Failed to write %d queued row(s): %s", len(rows), e)
+
+
 def init_db() -> None:
     """Create tables if they don't exist."""
     conn = get_connection()
@@ -608,6 +739,51 @@ def get_prior_run_count(repo: str) -> int:
         conn.close()
 
 
+_INSERT_RUN_SQL = """
+    INSERT INTO runs (installation_id, repo, pr_number, status, violations_found, violations_fixed, timestamp, correlation_id, job_id, job_status, fix_pr_number, fix_pr_url, ci_passed, runtime_seconds, vuln_types)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _run_params(
+    installation_id: int,
+    repo: str,
+    status: str,
+    pr_number: Optional[int] = None,
+    violations_found: int = 0,
+    violations_fixed: int = 0,
+    correlation_id: Optional[str] = None,
+    job_id: Optional[str] = None,
+    job_status: Optional[str] = None,
+    fix_pr_number: Optional[int] = None,
+    fix_pr_url: Optional[str] = None,
+    ci_passed: Optional[bool] = None,
+    runtime_seconds: Optional[float] = None,
+    vuln_types: Optional[list] = None,
+    timestamp: Optional[str] = None,
+) -> tuple:
+    import json as _json
+    now = timestamp or datetime.now(timezone.utc).isoformat()
+    vuln_types_json = _json.dumps(vuln_types) if vuln_types is not None else None
+    return (
+        installation_id,
+        repo,
+        pr_number,
+        status,
+        violations_found,
+        violations_fixed,
+        now,
+        correlation_id,
+        job_id,
+        job_status,
+        fix_pr_number,
+        fix_pr_url,
+        ci_passed,
+        runtime_seconds,
+        vuln_types_json,
+    )
+
+
 def insert_run(
     installation_id: int,
     repo: str,
@@ -625,39 +801,49 @@ def insert_run(
     vuln_types: Optional[list] = None,
 ) -> None:
     """Insert a run record."""
-    import json as _json
-    now = datetime.now(timezone.utc).isoformat()
-    vuln_types_json = _json.dumps(vuln_types) if vuln_types is not None else None
+    params = _run_params(
+        installation_id,
+        repo,
+        status,
+        pr_number=pr_number,
+        violations_found=violations_found,
+        violations_fixed=violations_fixed,
+        correlation_id=correlation_id,
+        job_id=job_id,
+        job_status=job_status,
+        fix_pr_number=fix_pr_number,
+        fix_pr_url=fix_pr_url,
+        ci_passed=ci_passed,
+        runtime_seconds=runtime_seconds,
+        vuln_types=vuln_types,
+    )
     conn = get_connection()
     try:
-        conn.execute(
-            """
-            INSERT INTO runs (installation_id, repo, pr_number, status, violations_found, violations_fixed, timestamp, correlation_id, job_id, job_status, fix_pr_number, fix_pr_url, ci_passed, runtime_seconds, vuln_types)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                installation_id,
-                repo,
-                pr_number,
-                status,
-                violations_found,
-                violations_fixed,
-                now,
-                correlation_id,
-                job_id,
-                job_status,
-                fix_pr_number,
-                fix_pr_url,
-                ci_passed,
-                runtime_seconds,
-                vuln_types_json,
-            ),
-        )
+        conn.execute(_INSERT_RUN_SQL, params)
         conn.commit()
     finally:
         conn.close()
 
 
+_run_writes = _BatchedInsert(_INSERT_RUN_SQL)
+
+
+def queue_run(**fields: Any) -> None:
+    """
+    Queue a run record for a batched write.
+
+    Accepts the ``insert_run`` keyword arguments plus an optional
+    ``timestamp`` (ISO 8601) recording when the run was observed.
+    """
+    _run_writes.add(_run_params(**fields))
+
+
+_INSERT_AUDIT_LOG_SQL = """
+    INSERT INTO audit_log (correlation_id, timestamp, action, repo, pr_number, result, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
 def insert_audit_log(
     action: str,
     timestamp: str,
@@ -676,10 +862,7 @@ def insert_audit_log(
     conn = get_connection()
     try:
         conn.execute(
-            """
-            INSERT INTO audit_log (correlation_id, timestamp, action, repo, pr_number, result, metadata)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
+            _INSERT_AUDIT_LOG_SQL,
             (correlation_id, timestamp, action, repo, pr_number, result, metadata_json),
         )
         conn.commit()
@@ -687,6 +870,31 @@ def insert_audit_log(
         conn.close()
 
 
+_audit_writes = _BatchedInsert(_INSERT_AUDIT_LOG_SQL)
+
+
+def queue_audit_log(
+    action: str,
+    timestamp: str,
+    correlation_id: Optional[str] = None,
+    repo: Optional[str] = None,
+    pr_number: Optional[int] = None,
+    result: Optional[str] = None,
+    metadata_json: Optional[str] = None,
+) -> None:
+    """Queue an audit log record for a batched write (see ``insert_audit_log``)."""
+    _audit_writes.add((correlation_id, timestamp, action, repo, pr_number, result, metadata_json))
+
+
+def flush_pending_writes() -> None:
+    """Write all queued run and audit log records now."""
+    _run_writes.flush()
+    _audit_writes.flush()
+
+
+atexit.register(flush_pending_writes)
+
+
 def update_run_job_status(
     job_id: str,
     job_status: Optional[str] = None,
@@ -10,10 +10,12 @@ Supported vulnerability types:
 from __future__ import annotations
 
 import logging
+import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Dict, Any
 
-from core.formatter import format_file
+from core.formatter import format_files
 
 logger = logging.getLogger(__name__)
 
@@ -123,45 +125,113 @@ def _severity_at_least(severity: str, threshold: str) -> bool:
     return sev >= thr
 
 
-def _match_rule_key(check_id_lower: str, candidates) -> Optional[str]:
+def _alternation(
+    entries: list[tuple[int, int, str, str]],
+) -> tuple[Optional[re.Pattern[str]], tuple[tuple[str, int, int], ...]]:
+    """
+    Compile ``(match_len, key_order, pattern, key)`` entries into one regex.
+
+    Each alternative is wrapped in its own capture group; the returned
+    table maps ``group_index - 1`` to ``(key, match_len, key_order)``.
+    Alternatives are ordered by match length (desc) then configuration
+    order, so at any position the regex engine picks the best candidate.
+    The alternation sits inside a lookahead so ``finditer`` also reports
+    overlapping matches.
+    """
+    if not entries:
+        return None, ()
+    entries.sort(key=lambda e: (-e[0], e[1]))
+    alternation = "|".join(f"({re.escape(pattern)})" for _, _, pattern, _ in entries)
+    regex = re.compile(f"(?=(?:{alternation}))")
+    groups = tuple((key, match_len, order) for match_len, order, _, key in entries)
+    return regex, groups
+
+
+@lru_cache(maxsize=128)
+def _compile_rule_keys(keys: tuple[str, ...]) -> tuple[tuple[int, str, str], ...]:
+    """Normalise configured rule keys to ``(order, key_lower, key)``, once per config."""
+    compiled: list[tuple[int, str, str]] = []
+    for order, key in enumerate(keys):
+        key_l = key.lower().strip()
+        if key_l:
+            compiled.append((order, key_l, key))
+    return tuple(compiled)
+
+
+@lru_cache(maxsize=256)
+def _compile_rule_aliases(
+    keys: tuple[str, ...],
+    skip_orders: frozenset[int],
+) -> tuple[Optional[re.Pattern[str]], tuple[tuple[str, int, int], ...]]:
+    """
+    Compile the aliases of every configured key except those in
+    *skip_orders* (keys that already matched directly) into one regex.
+
+    See :func:`_alternation` for the returned ``(regex, groups)`` shape.
+    """
+    entries: list[tuple[int, int, str, str]] = []
+    for order, key_l, key in _compile_rule_keys(keys):
+        if order in skip_orders:
+            continue
+        for alias in _RULE_KEY_ALIASES.get(key_l, []):
+            # An alias containing the key can only occur where the key
+            # does, and this key did not match directly.
+            if alias and key_l not in alias:
+                entries.append((len(alias), order, alias, key))
+    return _alternation(entries)
+
+
+def _match_rule_key(check_id_lower: str, keys: tuple[str, ...]) -> Optional[str]:
     """
     Best-effort mapping from a concrete Semgrep check_id to a logical
     rule key used in configuration (e.g. "sql-injection", "hardcoded-secret").
 
     We intentionally use substring matching so that rules like
-    "custom.sql-injection-fstring" still map to "sql-injection".
+    "custom.sql-injection-fstring" still map to "sql-injection". A key
+    found directly scores its own length; otherwise it scores its longest
+    alias found. The best score wins; ties go to the key listed first in
+    config.
     """
-    if isinstance(candidates, dict):
-        keys = list(candidates.keys())
-    else:
-        keys = list(candidates)
-
     best: Optional[str] = None
     best_len = -1
-    for key in keys:
-        key_l = str(key).lower().strip()
-        if not key_l:
-            continue
-        matched = False
+    best_order = 0
+    direct: set[int] = set()
+    for order, key_l, key in _compile_rule_keys(keys):
         if key_l in check_id_lower:
-            matched = True
-            match_len = len(key_l)
-        else:
-            aliases = _RULE_KEY_ALIASES.get(key_l, [])
-            match_len = -1
-            for alias in aliases:
-                if alias and alias in check_id_lower:
-                    matched = True
-                    match_len = max(match_len, len(alias))
-        if matched:
-            if match_len < 0:
-                match_len = len(key_l)
-            if best is None or match_len > best_len:
-                best = key
-                best_len = match_len
+            direct.add(order)
+            if len(key_l) > best_len:
+                best, best_len, best_order = key, len(key_l), order
+
+    regex, groups = _compile_rule_aliases(keys, frozenset(direct))
+    if regex is not None:
+        for m in regex.finditer(check_id_lower):
+            key, match_len, order = groups[m.lastindex - 1]
+            if match_len > best_len or (match_len == best_len and order < best_order):
+                best, best_len, best_order = key, match_len, order
     return best
 
 
+def _match_rule_key_dict(check_id_lower: str, enforce_dict: Dict[str, Any]) -> Optional[str]:
+    """Match against the keys of an ``enforce_per_rule`` mapping."""
+    if not enforce_dict:
+        return None
+    return _match_rule_key(check_id_lower, tuple(str(k) for k in enforce_dict))
+
+
+def _match_rule_key_list(check_id_lower: str, enabled_list: list) -> Optional[str]:
+    """Match against an ``enabled`` allowlist of rule keys."""
+    if not enabled_list:
+        return None
+    return _match_rule_key(check_id_lower, tuple(str(k) for k in enabled_list))
+
+
+# (id(config), directory) -> (config, resolved policy). Holding the config
+# keeps its id from being reused; the cache is still cleared at the start of
+# every process_findings() run in case the config was mutated in between.
+_DIR_POLICY_CACHE: Dict[tuple[int, str], tuple[Dict[str, Any], Optional[Dict[str, Any]]]] = {}
+_DIR_POLICY_CACHE_MAX = 256
+
+
 def _get_directory_policy(config: Dict[str, Any], relpath: str) -> Optional[Dict[str, Any]]:
     """
     Find the most specific directory policy for a given relative file path
@@ -175,18 +245,29 @@ def _get_directory_policy(config: Dict[str, Any], relpath: str) -> Optional[Dict
     # directory component with trailing slash
     dir_part = rel.rsplit("/", 1)[0] + "/" if "/" in rel else ""
 
+    # The match depends only on the directory component, so findings in the
+    # same directory share one lookup.
+    cache_key = (id(config), dir_part)
+    cached = _DIR_POLICY_CACHE.get(cache_key)
+    if cached is not None:
+        return cached[1]
+
     best_key: Optional[str] = None
     for key in policies.keys():
         k = str(key)
         if not k.endswith("/"):
             k = k + "/"
-        if dir_part.startswith(k) or rel.startswith(k):
+        if dir_part.startswith(k):
             if best_key is None or len(k) > len(best_key):
                 best_key = k
 
-    if best_key is None:
-        return None
-    return policies.get(best_key) or None
+    policy: Optional[Dict[str, Any]] = None
+    if best_key is not None:
+        policy = policies.get(best_key) or None
+    if len(_DIR_POLICY_CACHE) >= _DIR_POLICY_CACHE_MAX:
+        _DIR_POLICY_CACHE.clear()
+    _DIR_POLICY_CACHE[cache_key] = (config, policy)
+    return policy
 
 
 def _should_auto_fix(
@@ -220,15 +301,15 @@ def _should_auto_fix(
 
     # First try directory-specific enforce_per_rule
     if dir_enforce:
-        rule_key = _match_rule_key(check_id_lower, dir_enforce)
+        rule_key = _match_rule_key_dict(check_id_lower, dir_enforce)
 
     # Then global enforce_per_rule
     if rule_key is None and global_enforce:
-        rule_key = _match_rule_key(check_id_lower, global_enforce)
+        rule_key = _match_rule_key_dict(check_id_lower, global_enforce)
 
     # If still unknown, try the enabled list (serves as an allowlist)
     if rule_key is None and enabled_rules:
-        rule_key = _match_rule_key(check_id_lower, enabled_rules)
+        rule_key = _match_rule_key_list(check_id_lower, enabled_rules)
 
     # If an enabled allowlist is configured and we couldn't match this rule
     # to any enabled entry, treat it as "do not auto-fix".
@@ -425,6 +506,8 @@ def process_findings(
     """
     if not findings:
         return False, []
+
+    _DIR_POLICY_CACHE.clear()
     
     from concurrent.futures import ThreadPoolExecutor, as_completed
     import threading
@@ -561,57 +644,73 @@ def process_findings(
     if config and config.get("format_after_patch", True) and touched_files:
         import subprocess
 
-        def _numstat_total_for_file(repo: Path, rel: str) -> int:
+        def _numstat_totals(repo: Path, rels: list[str]) -> dict[str, int]:
             """
-            Return added+removed for the working-tree diff for a single file.
-            Uses git numstat; returns 0 if unknown/unavailable.
+            Return added+removed for the working-tree diff of each file.
+
+            One `git diff --numstat -z` call covers every path, so the
+            per-file line counting happens in git's C diff rather than one
+            process per file. Files absent from the output map to 0.
             """
-            rel_norm = str(rel).replace("\\", "/")
+            totals = {str(rel).replace("\\", "/"): 0 for rel in rels}
+            if not totals:
+                return totals
             try:
                 result = subprocess.run(
-                    ["git", "diff", "--numstat", "--", rel_norm],
+                    ["git", "diff", "--numstat", "-z", "--", *totals],
                     cwd=repo,
                     capture_output=True,
                     text=True,
                     check=False,
                 )
-                line = (result.stdout or "").strip().splitlines()
-                if not line:
-                    return 0
-                parts = line[0].split("\t")
-                if len(parts) < 2:
-                    return 0
+            except Exception:
+                return totals
+            # -z records are "added\tremoved\tpath\0"; binary files report "-".
+            for record in (result.stdout or "").split("\0"):
+                parts = record.split("\t", 2)
+                if len(parts) < 3 or parts[2] not in totals:
+                    continue
                 a, r = parts[0], parts[1]
                 added = int(a) if a.isdigit() else 0
                 removed = int(r) if r.isdigit() else 0
-                return added + removed
-            except Exception:
-                return 0
+                totals[parts[2]] = added + removed
+            return totals
 
         max_expansion = float(config.get("max_format_expansion", 0.2) or 0.2)
         if max_expansion < 0:
             max_expansion = 0.0
 
-        for relpath in sorted(touched_files):
+        # Snapshot every touched file first so all of them can be handed to
+        # the formatters in one batch (one process per formatter per run).
+        existing = [r for r in sorted(touched_files) if (repo_path / r).exists()]
+        baseline_totals = _numstat_totals(repo_path, existing)
+        snapshots: dict[str, tuple[int, str]] = {}
+        for relpath in existing:
             file_abs = repo_path / relpath
-            if not file_abs.exists():
-                continue
-
-            baseline_total = _numstat_total_for_file(repo_path, relpath)
+            baseline_total = baseline_totals[str(relpath).replace("\\", "/")]
             try:
                 before_text = file_abs.read_text(encoding="utf-8", errors="replace")
             except OSError:
                 continue
-
-            try:
-                success, _fmt_added, _fmt_removed = format_file(repo_path, relpath, None)
-                if not success:
-                    continue
-            except Exception as e:
-                logger.warning("Formatter failed for %s: %s", relpath, e)
-                continue
-
-            post_total = _numstat_total_for_file(repo_path, relpath)
+            snapshots[relpath] = (baseline_total, before_text)
+
+        try:
+            format_results = format_files(repo_path, list(snapshots)) if snapshots else {}
+        except Exception as e:
+            logger.warning("Formatter failed for %d file(s): %s", len(snapshots), e)
+            format_results = {}
+
+        formatted = [
+            relpath
+            for relpath in snapshots
+            if format_results.get(Path(relpath), (False, 0, 0))[0]
+        ]
+        post_totals = _numstat_totals(repo_path, formatted)
+
+        for relpath in formatted:
+            baseline_total, before_text = snapshots[relpath]
+            file_abs = repo_path / relpath
+            post_total = post_totals[str(relpath).replace("\\", "/")]
 
             # Guardrail: if formatting expands the total diff for this file
             # beyond (1 + max_expansion) of the pre-formatting diff, revert
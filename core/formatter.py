@@ -3,14 +3,23 @@ Language-aware formatting utilities for Fixpoint.
 
 Formatting is **best-effort** and intentionally conservative:
 - Only files that Fixpoint has already patched should be formatted.
-- External formatters (black, prettier) are invoked only if available.
+- External formatters (ruff, black, prettier) are invoked only if available;
+  black is called in-process (main thread only) when it is importable.
 - On any error, formatting is skipped rather than failing the run.
 """
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Tuple, Literal
+from typing import Any, Callable, Dict, Iterable, Literal, Optional, Sequence, Tuple
 import subprocess
 import difflib
 
@@ -32,11 +41,37 @@ def _detect_language(file_path: Path) -> FormatterLanguage:
     return "unknown"
 
 
-def _run_black(repo_path: Path, file_path: Path) -> bool:
-    """Run black on a single Python file, returning True on success."""
+@lru_cache(maxsize=None)
+def _resolve_tool(tool: str) -> Optional[Tuple[str, int]]:
+    """
+    Resolve a formatter executable on PATH once per process.
+
+    Returns ``(absolute_path, mtime_ns)`` or None if the tool is missing, so
+    absent formatters are skipped without spawning anything. The mtime
+    identifies the installed version for callers that cache results.
+    """
+    exe = shutil.which(tool)
+    if exe is None:
+        return None
+    try:
+        return exe, os.stat(exe).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _run_black(repo_path: Path, files: Sequence[Path]) -> bool:
+    """Run black on one or more Python files in a single process."""
+    if _get_black_lib():
+        # Same black as the in-process path, so results (and cache ids) match
+        cmd = [sys.executable, "-m", "black"]
+    else:
+        tool = _resolve_tool("black")
+        if tool is None:
+            return False
+        cmd = [tool[0]]
     try:
         subprocess.run(
-            ["black", str(file_path)],
+            [*cmd, *(str(f) for f in files)],
             cwd=repo_path,
             check=True,
             capture_output=True,
@@ -47,15 +82,18 @@ def _run_black(repo_path: Path, file_path: Path) -> bool:
         # black not installed – silently skip
         return False
     except subprocess.CalledProcessError as e:
-        logger.warning("black failed on %s: %s", file_path, e)
+        logger.warning("black failed on %s: %s", _describe(files), e)
         return False
 
 
-def _run_ruff_format(repo_path: Path, file_path: Path) -> bool:
-    """Run ruff format on a single Python file, returning True on success."""
+def _run_ruff_format(repo_path: Path, files: Sequence[Path]) -> bool:
+    """Run ruff format on one or more Python files in a single process."""
+    tool = _resolve_tool("ruff")
+    if tool is None:
+        return False
     try:
         subprocess.run(
-            ["ruff", "format", str(file_path)],
+            [tool[0], "format", *(str(f) for f in files)],
             cwd=repo_path,
             check=True,
             capture_output=True,
@@ -66,15 +104,18 @@ def _run_ruff_format(repo_path: Path, file_path: Path) -> bool:
         # ruff not installed – silently skip
         return False
     except subprocess.CalledProcessError as e:
-        logger.warning("ruff format failed on %s: %s", file_path, e)
+        logger.warning("ruff format failed on %s: %s", _describe(files), e)
         return False
 
 
-def _run_prettier_bin(repo_path: Path, file_path: Path) -> bool:
-    """Run prettier (binary) on a single JS/TS file."""
+def _run_prettier_bin(repo_path: Path, files: Sequence[Path]) -> bool:
+    """Run prettier (binary) on one or more JS/TS files."""
+    tool = _resolve_tool("prettier")
+    if tool is None:
+        return False
     try:
         subprocess.run(
-            ["prettier", "--write", str(file_path)],
+            [tool[0], "--write", *(str(f) for f in files)],
             cwd=repo_path,
             check=True,
             capture_output=True,
@@ -84,20 +125,23 @@ def _run_prettier_bin(repo_path: Path, file_path: Path) -> bool:
     except FileNotFoundError:
         return False
     except subprocess.CalledProcessError as e:
-        logger.warning("prettier (bin) failed on %s: %s", file_path, e)
+        logger.warning("prettier (bin) failed on %s: %s", _describe(files), e)
         return False
 
 
-def _run_prettier(repo_path: Path, file_path: Path) -> bool:
+def _run_prettier(repo_path: Path, files: Sequence[Path]) -> bool:
     """
-    Run prettier via npx on a JS/TS file.
+    Run prettier via npx on one or more JS/TS files.
 
     This assumes a Node toolchain is available; if not, we fail soft.
     """
+    tool = _resolve_tool("npx")
+    if tool is None:
+        return False
     try:
         subprocess.run(
             # Prefer local prettier without installing packages.
-            ["npx", "--no-install", "prettier", "--write", str(file_path)],
+            [tool[0], "--no-install", "prettier", "--write", *(str(f) for f in files)],
             cwd=repo_path,
             check=True,
             capture_output=True,
@@ -108,78 +152,378 @@ def _run_prettier(repo_path: Path, file_path: Path) -> bool:
         # Node / prettier not available – skip
         return False
     except subprocess.CalledProcessError as e:
-        logger.warning("prettier (npx) failed on %s: %s", file_path, e)
+        logger.warning("prettier (npx) failed on %s: %s", _describe(files), e)
         return False
 
 
+# The black module, imported lazily on first use so its CLI entry point can
+# be called in-process. None = not yet tried, False = not importable.
+_black_lib: Any = None
+
+
+def _get_black_lib() -> Any:
+    """Return the imported ``black`` module, or False if it is unavailable."""
+    global _black_lib
+    if _black_lib is None:
+        try:
+            import black  # type: ignore[import-not-found]
+
+            _black_lib = black
+        except ImportError:
+            _black_lib = False
+    return _black_lib
+
+
+def _run_black_inproc(repo_path: Path, files: Sequence[Path]) -> bool:
+    """
+    Run black in-process on one or more Python files.
+
+    Calls black's command-line entry point as a function rather than
+    spawning it, so config discovery (all of ``[tool.black]``, including
+    target-version, preview and force-exclude) and line-ending handling
+    are exactly those of the CLI.
+
+    Main thread only: for several files black installs signal handlers
+    (``set_wakeup_fd``), which fails in any other thread after the files
+    have already been rewritten.
+    """
+    black = _get_black_lib()
+    if not black:
+        return False
+    try:
+        code = black.main(["--quiet", *(str(f) for f in files)], standalone_mode=False)
+    except (Exception, SystemExit) as e:
+        # Usage errors (e.g. a missing file) raise instead of returning a code
+        logger.warning("black (in-process) failed on %s: %s", _describe(files), e)
+        return False
+    if code:
+        logger.warning("black (in-process) failed on %s: exit code %s", _describe(files), code)
+        return False
+    return True
+
+
+def _describe(files: Sequence[Path]) -> str:
+    """Short human-readable label for a batch of files in log messages."""
+    if len(files) == 1:
+        return str(files[0])
+    return f"{len(files)} files"
+
+
+def _format_python(repo_path: Path, files: Sequence[Path]) -> bool:
+    # Prefer ruff (fast, config-aware) if available, else black – in-process
+    # when the library is importable and we are on the main thread (e.g. not
+    # in format_files' batch pool), otherwise via its CLI.
+    if _run_ruff_format(repo_path, files):
+        return True
+    if _get_black_lib() and threading.current_thread() is threading.main_thread():
+        return _run_black_inproc(repo_path, files)
+    return _run_black(repo_path, files)
+
+
+def _format_js(repo_path: Path, files: Sequence[Path]) -> bool:
+    # Prefer prettier binary if present, else npx (no-install).
+    return _run_prettier_bin(repo_path, files) or _run_prettier(repo_path, files)
+
+
+_FORMATTERS: Dict[str, Callable[[Path, Sequence[Path]], bool]] = {
+    "python": _format_python,
+    "javascript": _format_js,
+    "typescript": _format_js,
+}
+
+
 def _diff_stats(before: str, after: str) -> Tuple[int, int]:
     """
     Compute approximate (lines_added, lines_removed) between two texts.
 
-    Uses unified diff and counts +/- lines, ignoring headers.
+    Formatter changes are usually local, so the common leading and trailing
+    lines are trimmed in O(n) first; difflib only matches the differing
+    middle section, and its opcodes are counted directly instead of
+    rendering a unified diff.
     """
-    added = 0
-    removed = 0
     before_lines = before.splitlines(keepends=False)
     after_lines = after.splitlines(keepends=False)
 
-    for line in difflib.unified_diff(before_lines, after_lines, n=0):
-        if not line:
+    start = 0
+    limit = min(len(before_lines), len(after_lines))
+    while start < limit and before_lines[start] == after_lines[start]:
+        start += 1
+
+    end_b = len(before_lines)
+    end_a = len(after_lines)
+    while end_b > start and end_a > start and before_lines[end_b - 1] == after_lines[end_a - 1]:
+        end_b -= 1
+        end_a -= 1
+
+    old = before_lines[start:end_b]
+    new = after_lines[start:end_a]
+    if not old or not new:
+        return len(new), len(old)
+
+    added = 0
+    removed = 0
+    matcher = difflib.SequenceMatcher(None, old, new)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
             continue
-        if line[0] == "+" and not line.startswith("+++"):
-            added += 1
-        elif line[0] == "-" and not line.startswith("---"):
-            removed += 1
+        removed += i2 - i1
+        added += j2 - j1
     return added, removed
 
 
-def format_file(
+# Hashes of content already known to be formatted, persisted alongside the
+# other Fixpoint caches so unchanged files skip the formatter across runs.
+FORMAT_CACHE_FILE = ".fixpoint_cache/fmt-cache.json"
+_FORMAT_CACHE_MAX_ENTRIES = 5000
+
+# Root-level config files that change formatter output.
+_FORMATTER_CONFIG_FILES = (
+    "pyproject.toml",
+    "ruff.toml",
+    ".ruff.toml",
+    "package.json",
+    ".editorconfig",
+    ".prettierrc",
+    ".prettierrc.json",
+    ".prettierrc.yaml",
+    ".prettierrc.yml",
+    ".prettierrc.js",
+    "prettier.config.js",
+)
+
+
+def _python_formatter_id() -> Optional[str]:
+    ruff = _resolve_tool("ruff")
+    if ruff is not None:
+        return f"ruff:{ruff[0]}:{ruff[1]}"
+    black = _get_black_lib()
+    if black:
+        return f"black-lib:{getattr(black, '__version__', '')}"
+    tool = _resolve_tool("black")
+    return f"black:{tool[0]}:{tool[1]}" if tool is not None else None
+
+
+def _js_formatter_id() -> Optional[str]:
+    tool = _resolve_tool("prettier") or _resolve_tool("npx")
+    return f"prettier:{tool[0]}:{tool[1]}" if tool is not None else None
+
+
+def _config_fingerprint(repo_path: Path) -> str:
+    """Hash of the repo's formatter config files (missing files hash as absent)."""
+    h = hashlib.blake2b(digest_size=16)
+    for name in _FORMATTER_CONFIG_FILES:
+        h.update(name.encode("utf-8"))
+        h.update(b"\0")
+        try:
+            h.update((repo_path / name).read_bytes())
+        except OSError:
+            h.update(b"\1")
+    return h.hexdigest()
+
+
+class FormatCache:
+    """
+    Persistent set of (content hash, formatter identity) pairs known to be
+    already formatted.
+
+    The identity combines the formatter's executable path + mtime (or
+    library version) with a fingerprint of the repo's formatter config, so
+    upgrading a formatter or editing its config invalidates old entries.
+    Cache failures are non-fatal.
+    """
+
+    def __init__(self, repo_path: Path):
+        self.path = Path(repo_path) / FORMAT_CACHE_FILE
+        self._entries: Optional[Dict[str, None]] = None
+        self._dirty = False
+
+    def _load(self) -> Dict[str, None]:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                self._entries = dict.fromkeys(data.get("entries", []))
+            except Exception:
+                pass
+        return self._entries
+
+    @staticmethod
+    def _key(content: str, formatter_id: str) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(formatter_id.encode("utf-8"))
+        h.update(b"\0")
+        h.update(content.encode("utf-8", errors="surrogatepass"))
+        return h.hexdigest()
+
+    def is_formatted(self, content: str, formatter_id: str) -> bool:
+        return self._key(content, formatter_id) in self._load()
+
+    def mark_formatted(self, content: str, formatter_id: str) -> None:
+        entries = self._load()
+        key = self._key(content, formatter_id)
+        if key not in entries:
+            entries[key] = None
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty or self._entries is None:
+            return
+        entries = list(self._entries)[-_FORMAT_CACHE_MAX_ENTRIES:]
+        try:
+            cache_dir = self.path.parent
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            # Keep the cache out of `git add .` in fix commits.
+            gitignore = cache_dir / ".gitignore"
+            if not gitignore.exists():
+                gitignore.write_text("*\n", encoding="utf-8")
+            self.path.write_text(json.dumps({"entries": entries}), encoding="utf-8")
+            self._dirty = False
+        except Exception:
+            # Cache failures are non-fatal
+            return
+
+
+_FORMATTER_IDS: Dict[Callable[[Path, Sequence[Path]], bool], Callable[[], Optional[str]]] = {
+    _format_python: _python_formatter_id,
+    _format_js: _js_formatter_id,
+}
+
+
+def format_files(
     repo_path: Path,
-    file_path: str | Path,
+    files: Iterable[str | Path],
     language: FormatterLanguage | None = None,
-) -> Tuple[bool, int, int]:
+) -> Dict[Path, Tuple[bool, int, int]]:
     """
-    Format a single file using language-appropriate tools.
+    Format several files, invoking each formatter once for all of its files.
+
+    Files are grouped by formatter (JS and TS share prettier) so a patch
+    touching N files pays one process startup per formatter instead of N.
+    If a batched run fails (e.g. one file has a syntax error), the batch is
+    retried file by file so the remaining files are still formatted.
 
     Returns:
-        (success, lines_added, lines_removed)
+        Mapping of each input path (as given) to
+        (success, lines_added, lines_removed).
     """
     repo_path = Path(repo_path)
-    path = Path(file_path)
-    if not path.is_absolute():
-        path = repo_path / path
+    results: Dict[Path, Tuple[bool, int, int]] = {}
+    # absolute path -> key the caller used
+    keys: Dict[Path, Path] = {}
+    before: Dict[Path, str] = {}
+    before_bytes: Dict[Path, bytes] = {}
+    # st_mtime_ns at snapshot time
+    before_mtime: Dict[Path, int] = {}
+    batches: Dict[Callable[[Path, Sequence[Path]], bool], list[Path]] = {}
+    cache = FormatCache(repo_path)
+    formatter_ids: Dict[Callable[[Path, Sequence[Path]], bool], Optional[str]] = {}
 
-    if not path.exists():
-        return False, 0, 0
+    for file_path in files:
+        key = Path(file_path)
+        path = key if key.is_absolute() else repo_path / key
+        if path in keys:
+            continue
+        keys[path] = key
+        results[key] = (False, 0, 0)
 
-    if language is None or language == "unknown":
-        language = _detect_language(path)
+        if not path.exists():
+            continue
 
-    # Take snapshot before formatting
-    try:
-        before = path.read_text(encoding="utf-8", errors="replace")
-    except OSError:
-        return False, 0, 0
-
-    ran = False
-    if language == "python":
-        # Prefer ruff (fast, config-aware) if available, else black.
-        ran = _run_ruff_format(repo_path, path) or _run_black(repo_path, path)
-    elif language in ("javascript", "typescript"):
-        # Prefer prettier binary if present, else npx (no-install).
-        ran = _run_prettier_bin(repo_path, path) or _run_prettier(repo_path, path)
+        lang = language
+        if lang is None or lang == "unknown":
+            lang = _detect_language(path)
+        runner = _FORMATTERS.get(lang)
+        if runner is None:
+            # No known formatter – skip
+            continue
+
+        # Take snapshot before formatting
+        try:
+            st = path.stat()
+            before_bytes[path] = path.read_bytes()
+        except OSError:
+            continue
+        before[path] = before_bytes[path].decode("utf-8", errors="replace")
+        before_mtime[path] = st.st_mtime_ns
+
+        if runner not in formatter_ids:
+            id_fn = _FORMATTER_IDS.get(runner)
+            fid = id_fn() if id_fn is not None else None
+            formatter_ids[runner] = f"{fid}:{_config_fingerprint(repo_path)}" if fid else None
+        fid = formatter_ids[runner]
+        if fid is not None and cache.is_formatted(before[path], fid):
+            # Unchanged since it was last formatted – nothing to do.
+            results[key] = (True, 0, 0)
+            continue
+        batches.setdefault(runner, []).append(path)
+
+    def _run_batch(
+        runner: Callable[[Path, Sequence[Path]], bool], paths: list[Path]
+    ) -> list[Path]:
+        if runner(repo_path, paths):
+            return paths
+        if len(paths) > 1:
+            return [p for p in paths if runner(repo_path, [p])]
+        return []
+
+    # Different formatters (e.g. ruff and prettier) touch disjoint files and
+    # mostly wait on child processes, so run their batches concurrently.
+    formatted_by_runner: Dict[Callable[[Path, Sequence[Path]], bool], list[Path]] = {}
+    if len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+            futures = {
+                runner: executor.submit(_run_batch, runner, paths)
+                for runner, paths in batches.items()
+            }
+            for runner, future in futures.items():
+                try:
+                    formatted_by_runner[runner] = future.result()
+                except Exception as e:
+                    logger.warning("Formatter batch failed: %s", e)
+                    formatted_by_runner[runner] = []
     else:
-        # No known formatter – skip
-        return False, 0, 0
+        for runner, paths in batches.items():
+            formatted_by_runner[runner] = _run_batch(runner, paths)
 
-    if not ran:
-        return False, 0, 0
+    for runner, formatted in formatted_by_runner.items():
+        fid = formatter_ids.get(runner)
+        for path in formatted:
+            try:
+                # Compare content rather than trusting (mtime, size): a
+                # same-size rewrite within the mtime granularity would look
+                # untouched and get cached as formatted.
+                after_bytes = path.read_bytes()
+                if after_bytes == before_bytes[path]:
+                    st = path.stat()
+                    if st.st_mtime_ns != before_mtime[path]:
+                        # Rewritten with identical content: restore the old
+                        # mtime so git's stat check still sees it unchanged.
+                        os.utime(path, ns=(st.st_atime_ns, before_mtime[path]))
+                    after = before[path]
+                    added, removed = 0, 0
+                else:
+                    after = after_bytes.decode("utf-8", errors="replace")
+                    added, removed = _diff_stats(before[path], after)
+            except OSError:
+                continue
+            results[keys[path]] = (True, added, removed)
+            if fid is not None:
+                cache.mark_formatted(after, fid)
 
-    try:
-        after = path.read_text(encoding="utf-8", errors="replace")
-    except OSError:
-        return False, 0, 0
+    cache.save()
+    return results
 
-    added, removed = _diff_stats(before, after)
-    return True, added, removed
 
+def format_file(
+    repo_path: Path,
+    file_path: str | Path,
+    language: FormatterLanguage | None = None,
+) -> Tuple[bool, int, int]:
+    """
+    Format a single file using language-appropriate tools.
+
+    Returns:
+        (success, lines_added, lines_removed)
+    """
+    results = format_files(repo_path, [file_path], language)
+    return results[Path(file_path)]
@@ -9,6 +9,10 @@ from pathlib import Path
 from datetime import datetime, timezone
 
 
+# Lines of test output kept for failure reporting.
+TEST_OUTPUT_TAIL_LINES = 4000
+
+
 def run(cmd: list[str], cwd: Path | None = None) -> subprocess.CompletedProcess:
     """Run a command and raise a readable error if it fails."""
     p = subprocess.run(
@@ -26,14 +30,91 @@ def run(cmd: list[str], cwd: Path | None = None) -> subprocess.CompletedProcess:
     return p
 
 
+def _has_staged_changes(repo_path: Path) -> bool:
+    """
+    Return True if the index differs from HEAD.
+
+    Uses the exit code of `git diff --cached --quiet` so no file listing is
+    captured or decoded, however many files are staged.
+    """
+    p = subprocess.run(
+        ["git", "diff", "--cached", "--quiet"],
+        cwd=str(repo_path),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    if p.returncode not in (0, 1):
+        raise RuntimeError(
+            f"Command failed: git diff --cached --quiet\n\nSTDERR:\n{p.stderr}"
+        )
+    return p.returncode == 1
+
+
+# Paths that cannot affect a test run. requirements*.txt is deliberately
+# not covered by the *.txt suffix rule.
+_DOC_SUFFIXES = (".md", ".rst")
+_DOC_DIRS = ("docs/",)
+_DOC_NAMES = ("LICENSE",)
+# Only these .txt files count as docs; others (requirements, constraints,
+# CMakeLists.txt, ...) can change the build or test run.
+_DOC_TXT_PREFIXES = ("README", "CHANGELOG", "LICENSE")
+
+
+def _test_relevant(paths: list[str]) -> bool:
+    """
+    Return True if any changed path could influence the test suite.
+
+    An empty list is treated as relevant so an unknown change set never
+    skips tests.
+    """
+    if not paths:
+        return True
+    for path in paths:
+        path = path.replace("\\", "/")
+        name = path.rsplit("/", 1)[-1]
+        if path.startswith(_DOC_DIRS) or name in _DOC_NAMES:
+            continue
+        if name.endswith(_DOC_SUFFIXES):
+            continue
+        if name.endswith(".txt") and name.upper().startswith(_DOC_TXT_PREFIXES):
+            continue
+        return True
+    return False
+
+
+def _last_commit_paths(repo_path: Path) -> list[str]:
+    """Return paths changed by HEAD, or [] if they cannot be determined."""
+    try:
+        out = run(["git", "diff", "--name-only", "HEAD~1", "HEAD"], cwd=repo_path).stdout
+    except Exception:
+        return []
+    return [line for line in out.splitlines() if line]
+
+
+GIT_BOT_EMAIL = "fixpoint-bot@users.noreply.github.com"
+GIT_BOT_NAME = "fixpoint-bot"
+
+# Bot identity passed inline to commands that create commits, so commit
+# paths don't spawn separate `git config` processes first.
+_IDENTITY_ARGS = ["-c", f"user.email={GIT_BOT_EMAIL}", "-c", f"user.name={GIT_BOT_NAME}"]
+
+
+def _git_as_bot(*args: str) -> list[str]:
+    """Build a git command line that commits as the Fixpoint bot."""
+    return ["git", *_IDENTITY_ARGS, *args]
+
+
 def setup_git_identity(repo_path: Path) -> None:
     """Ensure git identity exists (required on GitHub Actions runners)."""
     run(
-        ["git", "config", "user.email", "fixpoint-bot@users.noreply.github.com"],
+        ["git", "config", "user.email", GIT_BOT_EMAIL],
         cwd=repo_path,
     )
     run(
-        ["git", "config", "user.name", "fixpoint-bot"],
+        ["git", "config", "user.name", GIT_BOT_NAME],
         cwd=repo_path,
     )
 
@@ -49,8 +130,6 @@ def commit_and_push_new_branch(
     Returns:
         True if changes were committed and pushed, False if no changes
     """
-    setup_git_identity(repo_path)
-    
     # Create branch
     run(["git", "checkout", "-B", branch_name], cwd=repo_path)
     
@@ -58,13 +137,12 @@ def commit_and_push_new_branch(
     run(["git", "add", "."], cwd=repo_path)
     
     # Check if there are changes
-    status = run(["git", "status", "--porcelain"], cwd=repo_path)
-    if not status.stdout.strip():
+    if not _has_staged_changes(repo_path):
         return False
     
     # Commit and push
     run(
-        ["git", "commit", "-m", commit_message],
+        _git_as_bot("commit", "-m", commit_message),
         cwd=repo_path,
     )
     run(["git", "push", "-u", "origin", branch_name], cwd=repo_path)
@@ -74,7 +152,11 @@ def commit_and_push_new_branch(
 def run_tests(repo_path: Path, command: str, timeout: int = 300) -> tuple[bool, str]:
     """
     Run test command before commit (safety rail).
-    
+
+    Output (stdout and stderr interleaved) is streamed line by line and only
+    the last TEST_OUTPUT_TAIL_LINES lines are kept, so chatty test runners
+    use constant memory and can't fill an undrained pipe.
+
     Args:
         repo_path: Path to repository
         command: Shell command to run (e.g. "pytest", "npm test")
@@ -84,24 +166,44 @@ def run_tests(repo_path: Path, command: str, timeout: int = 300) -> tuple[bool,
         Tuple of (success, output_or_error_message)
     """
     import shlex
-    import subprocess
+    import threading
+    from collections import deque
     
     try:
         parts = shlex.split(command)
-        result = subprocess.run(
+        tail: deque[str] = deque(maxlen=TEST_OUTPUT_TAIL_LINES)
+        timed_out = threading.Event()
+        with subprocess.Popen(
             parts,
             cwd=repo_path,
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True,
-            timeout=timeout,
             encoding="utf-8",
             errors="replace",
-        )
-        if result.returncode == 0:
-            return True, result.stdout or ""
-        return False, result.stderr or result.stdout or f"Exit code {result.returncode}"
-    except subprocess.TimeoutExpired:
-        return False, f"Test command timed out after {timeout}s"
+            bufsize=1,
+        ) as proc:
+            def _kill() -> None:
+                timed_out.set()
+                proc.kill()
+
+            timer = threading.Timer(timeout, _kill)
+            timer.daemon = True
+            timer.start()
+            try:
+                assert proc.stdout is not None
+                for line in proc.stdout:
+                    tail.append(line)
+                returncode = proc.wait()
+            finally:
+                timer.cancel()
+
+        if timed_out.is_set():
+            return False, f"Test command timed out after {timeout}s"
+        output = "".join(tail)
+        if returncode == 0:
+            return True, output
+        return False, output or f"Exit code {returncode}"
     except FileNotFoundError:
         return False, f"Command not found: {command.split()[0] if command else command}"
     except Exception as e:
@@ -122,24 +224,22 @@ def commit_and_push_to_existing_branch(
     Raises:
         subprocess.CalledProcessError: If git operations fail (e.g., branch protection)
     """
-    setup_git_identity(repo_path)
-    
-    # Checkout the branch (fetch first to ensure we have latest)
+    # Fetch the latest remote tip and point the local branch at it in one
+    # checkout. Uncommitted fixes in the working tree are carried over
+    # (unlike `reset --hard`), and no separate pull/merge is needed.
     run(["git", "fetch", "origin", branch_name], cwd=repo_path)
-    run(["git", "checkout", branch_name], cwd=repo_path)
-    run(["git", "pull", "origin", branch_name], cwd=repo_path)
+    run(["git", "checkout", "-B", branch_name, f"origin/{branch_name}"], cwd=repo_path)
     
     # Stage changes
     run(["git", "add", "."], cwd=repo_path)
     
     # Check if there are changes
-    status = run(["git", "status", "--porcelain"], cwd=repo_path)
-    if not status.stdout.strip():
+    if not _has_staged_changes(repo_path):
         return False
     
     # Commit and push (may raise CalledProcessError on branch protection)
     run(
-        ["git", "commit", "-m", commit_message],
+        _git_as_bot("commit", "-m", commit_message),
         cwd=repo_path,
     )
     run(["git", "push", "origin", branch_name], cwd=repo_path)
@@ -164,7 +264,9 @@ def commit_with_rollback(
 
     Semantics (two-phase with rollback):
     - Always commit and push first (using commit_and_push_to_existing_branch).
-    - If test_command is provided, run tests *after* the commit.
+    - If test_command is provided, run tests *after* the commit, unless the
+      commit only touched documentation (*.md, *.rst, LICENSE, docs/, and
+      README/CHANGELOG/LICENSE *.txt files).
       - If tests pass, keep the commit and return (True, None).
       - If tests fail, automatically create a rollback commit using
         `git revert` and push it, then return (False, error_message).
@@ -191,6 +293,11 @@ def commit_with_rollback(
         if not test_command:
             return True, None
 
+        # Skip the (potentially long) test run when the commit only touched
+        # documentation.
+        if not _test_relevant(_last_commit_paths(repo_path)):
+            return True, None
+
         ok, output = run_tests(repo_path, test_command, timeout=test_timeout)
         if ok:
             return True, None
@@ -204,7 +311,7 @@ def commit_with_rollback(
             if last_commit:
                 # Create a revert commit and push it so remote state is clean
                 run(
-                    ["git", "revert", "--no-edit", last_commit],
+                    _git_as_bot("revert", "--no-edit", last_commit),
                     cwd=repo_path,
                 )
                 run(
@@ -8,10 +8,12 @@ from __future__ import annotations
 import base64
 import logging
 import os
+import threading
 import time
+from datetime import datetime
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 # Lazy import to avoid requiring PyJWT when not using GitHub App mode
 _JWT_MODULE = None
@@ -146,6 +148,82 @@ def _get_jwt_module():
     return _JWT_MODULE
 
 
+# Signed app JWTs, keyed by (app_id, private_key) -> (jwt, exp epoch).
+_jwt_cache: Dict[Tuple[str, str], Tuple[str, int]] = {}
+# Installation tokens, keyed by (app_id, installation_id) -> (token, exp epoch).
+_inst_token_cache: Dict[Tuple[str, int], Tuple[str, int]] = {}
+_token_cache_lock = threading.Lock()
+
+# Refresh cached credentials this many seconds before they actually expire.
+_JWT_EXPIRY_MARGIN = 60
+_INST_TOKEN_EXPIRY_MARGIN = 120
+
+
+# Shared keep-alive session for api.github.com (None = not yet created,
+# False = requests unavailable, fall back to urllib).
+_http_session = None
+
+
+def _get_http_session():
+    """Lazily create a shared ``requests.Session`` so token exchanges reuse one TLS connection."""
+    global _http_session
+    if _http_session is None:
+        with _token_cache_lock:
+            if _http_session is None:
+                try:
+                    import requests  # type: ignore[import-untyped]
+
+                    _http_session = requests.Session()
+                except ImportError:
+                    _http_session = False
+    return _http_session or None
+
+
+def _parse_expires_at(value: Optional[str]) -> Optional[int]:
+    """Parse GitHub's ISO-8601 ``expires_at`` (e.g. 2024-01-01T00:00:00Z) to epoch seconds."""
+    if not value:
+        return None
+    try:
+        text = str(value).strip()
+        if text.endswith("Z"):
+            text = text[:-1] + "+00:00"
+        return int(datetime.fromisoformat(text).timestamp())
+    except Exception:
+        return None
+
+
+def _get_app_jwt(app_id: str, private_key: str) -> str:
+    """
+    Return an RS256 app JWT, reusing a cached one until shortly before it expires.
+
+    Raises on signing errors (caller handles).
+    """
+    cache_key = (app_id, private_key)
+    now = int(time.time())
+    with _token_cache_lock:
+        cached = _jwt_cache.get(cache_key)
+    if cached is not None and now < cached[1] - _JWT_EXPIRY_MARGIN:
+        return cached[0]
+
+    jwt_module = _get_jwt_module()
+    exp = now + 600  # 10 minutes max
+    payload = {
+        "iat": now - 60,  # 60 seconds in past (clock drift)
+        "exp": exp,
+        "iss": app_id,
+    }
+    encoded_jwt = jwt_module.encode(
+        payload,
+        private_key,
+        algorithm="RS256",
+    )
+    if hasattr(encoded_jwt, "decode"):
+        encoded_jwt = encoded_jwt.decode("utf-8")
+    with _token_cache_lock:
+        _jwt_cache[cache_key] = (encoded_jwt, exp)
+    return encoded_jwt
+
+
 def get_installation_access_token(installation_id: int) -> Optional[str]:
     """
     Generate a JWT and exchange it for an installation access token.
@@ -153,6 +231,9 @@ def get_installation_access_token(installation_id: int) -> Optional[str]:
     Requires GITHUB_APP_ID and GITHUB_APP_PRIVATE_KEY (or GITHUB_APP_PRIVATE_KEY_PATH)
     environment variables.
 
+    Both the app JWT (valid 10 minutes) and the installation token (valid
+    ~1 hour) are cached in-process and reused until shortly before expiry.
+
     Args:
         installation_id: GitHub App installation ID from webhook payload
 
@@ -162,53 +243,55 @@ def get_installation_access_token(installation_id: int) -> Optional[str]:
     app_id = os.getenv("GITHUB_APP_ID")
     if not app_id:
         return None
+    app_id = app_id.strip()
+
+    token_key = (app_id, int(installation_id))
+    with _token_cache_lock:
+        cached = _inst_token_cache.get(token_key)
+    if cached is not None and time.time() < cached[1] - _INST_TOKEN_EXPIRY_MARGIN:
+        return cached[0]
 
     private_key = _load_private_key()
     if not private_key or not private_key.strip():
         return None
 
     try:
-        jwt_module = _get_jwt_module()
-        now = int(time.time())
-        payload = {
-            "iat": now - 60,  # 60 seconds in past (clock drift)
-            "exp": now + 600,  # 10 minutes max
-            "iss": app_id.strip(),
-        }
-        encoded_jwt = jwt_module.encode(
-            payload,
-            private_key,
-            algorithm="RS256",
-        )
-        if hasattr(encoded_jwt, "decode"):
-            encoded_jwt = encoded_jwt.decode("utf-8")
+        encoded_jwt = _get_app_jwt(app_id, private_key)
     except Exception as e:
         _log.warning("Failed to create GitHub App JWT: %s", e)
         return None
 
     # Exchange JWT for installation token
+    url = f"https://api.github.com/app/installations/{installation_id}/access_tokens"
+    headers = {
+        "Authorization": f"Bearer {encoded_jwt}",
+        "Accept": "application/vnd.github+json",
+        "X-GitHub-Api-Version": "2022-11-28",
+    }
     try:
-        import urllib.request
-        import json as _json
-
-        url = f"https://api.github.com/app/installations/{installation_id}/access_tokens"
-        req = urllib.request.Request(
-            url,
-            data=b"",
-            headers={
-                "Authorization": f"Bearer {encoded_jwt}",
-                "Accept": "application/vnd.github+json",
-                "X-GitHub-Api-Version": "2022-11-28",
-            },
-            method="POST",
-        )
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            data = _json.loads(resp.read().decode())
-            return data.get("token")
+        session = _get_http_session()
+        if session is not None:
+            resp = session.post(url, data=b"", headers=headers, timeout=10)
+            resp.raise_for_status()
+            data = resp.json()
+        else:
+            import urllib.request
+            import json as _json
+
+            req = urllib.request.Request(url, data=b"", headers=headers, method="POST")
+            with urllib.request.urlopen(req, timeout=10) as raw_resp:
+                data = _json.loads(raw_resp.read().decode())
     except Exception as e:
         _log.warning("Failed to get installation token: %s", e)
         return None
 
+    token = data.get("token")
+    expires_at = _parse_expires_at(data.get("expires_at"))
+    if token and expires_at is not None:
+        with _token_cache_lock:
+            _inst_token_cache[token_key] = (token, expires_at)
+    return token
+
 
 def is_github_app_configured() -> bool:
     """Check if GitHub App auth is configured (APP_ID + private key)."""
@@ -5,14 +5,19 @@ Similar to .gitignore, allows teams to exclude files/directories from scanning.
 from __future__ import annotations
 
 import fnmatch
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
 
 
 def read_ignore_file(repo_path: Path) -> List[str]:
     """
     Read .fixpointignore file from repo root.
     
+    The parsed patterns are cached per file path, mtime and size, so
+    repeated calls only cost a stat until the file is edited.
+    
     Args:
         repo_path: Repository root path
     
@@ -21,30 +26,158 @@ def read_ignore_file(repo_path: Path) -> List[str]:
     """
     ignore_file = repo_path / ".fixpointignore"
     
-    if not ignore_file.exists():
+    try:
+        st = ignore_file.stat()
+    except OSError:
         return []
     
+    return list(_read_ignore_cached(str(ignore_file), st.st_mtime_ns, st.st_size))
+
+
+@lru_cache(maxsize=32)
+def _read_ignore_cached(ignore_file: str, mtime_ns: int, size: int) -> Tuple[str, ...]:
     patterns = []
-    for line in ignore_file.read_text(encoding="utf-8", errors="ignore").splitlines():
+    try:
+        text = Path(ignore_file).read_text(encoding="utf-8", errors="ignore")
+    except OSError:
+        return ()
+    for line in text.splitlines():
         # Strip whitespace and comments
         line = line.strip()
         if not line or line.startswith("#"):
             continue
         patterns.append(line)
     
-    return patterns
+    return tuple(patterns)
+
+
+def _glob_regex(glob: str) -> str:
+    """fnmatch-style glob -> regex fragment (``*`` may cross ``/``, as in fnmatch)."""
+    return fnmatch.translate(glob)
+
+
+# Matches only when the remainder of the path (the basename) has no "/".
+_BASENAME_PREFIX = r"(?:.*/)?(?=[^/]*\Z)"
+
+
+def _pattern_regex(pattern: str) -> str:
+    """
+    Translate a single ignore pattern into a regex fragment that must match
+    the whole normalized path.
+
+    Supports:
+    - Exact matches: `file.py`
+    - Directory matches: `dir/`
+    - Glob patterns: `*.py`, `test_*.py` (matched against the basename)
+    - Anywhere globs: `**/*.py`
+    - Path globs: `src/*.py` (first segment literal, rest globbed)
+    - Path prefixes: `src/legacy` (matches everything beneath it)
+    """
+    frags = [re.escape(pattern)]
+
+    if pattern.endswith("/"):
+        frags.append(re.escape(pattern.rstrip("/")) + r"(?:/.*)?")
+
+    if "*" in pattern or "?" in pattern:
+        if "/" in pattern:
+            if pattern.startswith("**/"):
+                glob_part = pattern[3:]
+                frags.append(_glob_regex(glob_part))
+                frags.append(_BASENAME_PREFIX + _glob_regex(glob_part))
+            else:
+                head, rest = pattern.split("/", 1)
+                frags.append(re.escape(head) + "/" + _glob_regex(rest))
+        else:
+            frags.append(_BASENAME_PREFIX + _glob_regex(pattern))
+
+    if "/" in pattern and not pattern.endswith("/"):
+        frags.append(re.escape(pattern) + "/.*")
+
+    return "|".join(f"(?:{f})" for f in frags)
+
+
+class CompiledIgnore:
+    """
+    A set of .fixpointignore patterns compiled into regexes.
+
+    Follows git's last-match-wins rule: a later ``!pattern`` re-includes
+    paths matched by earlier patterns, and a later plain pattern excludes
+    them again. Unlike git, a negation can re-include a file inside an
+    ignored directory.
+
+    Consecutive patterns of the same polarity are joined into one regex, so
+    matching a path costs one C-level ``fullmatch`` per run of patterns
+    (usually one or two) instead of a Python loop over every pattern.
+    """
+
+    def __init__(self, ignore_patterns: List[str]):
+        # [(negated, [fragments])] in file order
+        runs: List[Tuple[bool, List[str]]] = []
+        for pattern in ignore_patterns:
+            negated = pattern.startswith("!")
+            if negated:
+                pattern = pattern[1:]
+                if not pattern:
+                    continue
+            frag = _pattern_regex(pattern.replace("\\", "/"))
+            if runs and runs[-1][0] == negated:
+                runs[-1][1].append(frag)
+            else:
+                runs.append((negated, [frag]))
+
+        # A leading negation can't re-include anything.
+        while runs and runs[0][0]:
+            runs.pop(0)
+
+        # Evaluated last-to-first: the first run that matches decides.
+        self._runs = [
+            (negated, re.compile("|".join(f"(?:{f})" for f in frags), re.DOTALL))
+            for negated, frags in reversed(runs)
+        ]
+
+    def matches(self, file_path: str) -> bool:
+        """Return True if the relative path should be ignored."""
+        if not self._runs:
+            return False
+        normalized_path = file_path.replace("\\", "/")
+        for negated, regex in self._runs:
+            if regex.fullmatch(normalized_path) is not None:
+                return not negated
+        return False
+
+    def filter(self, file_paths: List[str]) -> List[str]:
+        """Return the paths that are not ignored, preserving order."""
+        if not self._runs:
+            return list(file_paths)
+        if len(self._runs) == 1:
+            # No effective negations: a single bound fullmatch per path.
+            fullmatch = self._runs[0][1].fullmatch
+            return [p for p in file_paths if fullmatch(p.replace("\\", "/")) is None]
+        matches = self.matches
+        return [p for p in file_paths if not matches(p)]
+
+
+@lru_cache(maxsize=32)
+def _compile_cached(ignore_patterns: Tuple[str, ...]) -> CompiledIgnore:
+    return CompiledIgnore(list(ignore_patterns))
+
+
+def compile_patterns(ignore_patterns: List[str]) -> CompiledIgnore:
+    """
+    Compile ignore patterns (e.g. from ``read_ignore_file``) once for reuse.
+
+    Compiled matchers are cached per pattern list, so repeated calls with
+    the same patterns are cheap.
+    """
+    return _compile_cached(tuple(ignore_patterns))
 
 
 def should_ignore_file(file_path: str, ignore_patterns: List[str], repo_path: Path) -> bool:
     """
     Check if a file should be ignored based on .fixpointignore patterns.
     
-    Supports:
-    - Exact matches: `file.py`
-    - Directory matches: `dir/` or `dir/**`
-    - Glob patterns: `*.py`, `test_*.py`
-    - Path patterns: `src/legacy/`
-    - Negation: `!important.py` (not yet implemented, but pattern supported)
+    See ``_pattern_regex`` for the supported pattern forms. A later
+    ``!pattern`` re-includes files matched by earlier patterns.
     
     Args:
         file_path: Relative file path (e.g., "src/app.py")
@@ -56,78 +189,7 @@ def should_ignore_file(file_path: str, ignore_patterns: List[str], repo_path: Pa
     """
     if not ignore_patterns:
         return False
-    
-    # Normalize file path (use forward slashes for consistency)
-    normalized_path = file_path.replace("\\", "/")
-    
-    # Check each pattern
-    for pattern in ignore_patterns:
-        # Handle negation (future feature)
-        if pattern.startswith("!"):
-            # For now, we don't support negation
-            continue
-        
-        # Normalize pattern
-        pattern = pattern.replace("\\", "/")
-        
-        # Check if pattern matches
-        if _pattern_matches(normalized_path, pattern):
-            return True
-    
-    return False
-
-
-def _pattern_matches(file_path: str, pattern: str) -> bool:
-    """
-    Check if a file path matches an ignore pattern.
-    
-    Args:
-        file_path: Normalized file path (forward slashes)
-        pattern: Ignore pattern
-    
-    Returns:
-        True if matches
-    """
-    # Exact match
-    if file_path == pattern:
-        return True
-    
-    # Directory match (ends with /)
-    if pattern.endswith("/"):
-        pattern_dir = pattern.rstrip("/")
-        if file_path.startswith(pattern_dir + "/") or file_path == pattern_dir:
-            return True
-    
-    # Glob pattern (fnmatch)
-    # Convert pattern to regex-like matching
-    if "*" in pattern or "?" in pattern:
-        # Handle directory patterns
-        if "/" in pattern:
-            # Pattern like "src/*.py" or "tests/**/*.py"
-            if pattern.startswith("**/"):
-                # Match anywhere: **/*.py
-                glob_part = pattern[3:]
-                if fnmatch.fnmatch(file_path, glob_part) or fnmatch.fnmatch(Path(file_path).name, glob_part):
-                    return True
-            elif "/" in pattern:
-                # Pattern like "src/*.py"
-                parts = pattern.split("/", 1)
-                if file_path.startswith(parts[0] + "/"):
-                    remaining = file_path[len(parts[0]) + 1:]
-                    if fnmatch.fnmatch(remaining, parts[1]):
-                        return True
-        else:
-            # Simple glob: *.py, test_*.py
-            if fnmatch.fnmatch(Path(file_path).name, pattern):
-                return True
-    
-    # Prefix match (directory)
-    if "/" in pattern and not pattern.endswith("/"):
-        # Pattern like "src/legacy" should match "src/legacy/file.py"
-        if file_path.startswith(pattern + "/"):
-            return True
-    
-    return False
+    return compile_patterns(ignore_patterns).matches(file_path)
 
 
 def filter_ignored_files(
@@ -152,9 +214,4 @@ def filter_ignored_files(
     if not ignore_patterns:
         return file_paths
     
-    filtered = []
-    for file_path in file_paths:
-        if not should_ignore_file(file_path, ignore_patterns, repo_path):
-            filtered.append(file_path)
-    
-    return filtered
+    return compile_patterns(ignore_patterns).filter(file_paths)
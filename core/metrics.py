@@ -8,19 +8,88 @@ counts). Never include source code, secret names, or file contents. See docs/THR
 """
 from __future__ import annotations
 
+import contextlib
 import csv
+import gzip
 import json
 import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import Counter, deque
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Iterable
+from typing import Any, Collection, Deque, Dict, List, Optional, Iterable
 
-from core.observability import log_processing_result
+from core.observability import log_audit_event
 
 logger = logging.getLogger(__name__)
 
-# In-memory metrics store (in production, use database)
-_metrics_store: List[Dict] = []
+# Most recent events kept in memory (in production, use database). Older
+# events are dropped, or appended to METRICS_SPILL_PATH as CSV when it is
+# set; the running totals below still include them.
+METRICS_MAX_EVENTS = int(os.getenv("FIXPOINT_METRICS_MAX", "10000"))
+METRICS_SPILL_PATH: Optional[Path] = (
+    Path(os.environ["FIXPOINT_METRICS_SPILL_PATH"]) if os.getenv("FIXPOINT_METRICS_SPILL_PATH") else None
+)
+_SPILL_BATCH = 500
+_metrics_store: Deque[Dict] = deque(maxlen=METRICS_MAX_EVENTS)
+_spilled: List[Dict] = []
+
+# Running totals updated by record_metric, so summaries don't rescan the
+# store. Guarded by _store_lock together with _metrics_store.
+_store_lock = threading.Lock()
+
+
+def _new_run_stats(max_runtimes: Optional[int] = None) -> Dict[str, Any]:
+    return {
+        "run_count": 0,
+        # Runtime sample for the percentiles; the running aggregate keeps
+        # only the most recent max_runtimes so it stays bounded.
+        "runtimes": deque(maxlen=max_runtimes),
+        "fixes_attempted": 0,
+        "fixes_applied": 0,
+        "degraded_to_warn_count": 0,
+        "degraded_reasons": Counter(),
+        "failure_reasons": Counter(),
+    }
+
+
+def _new_aggregates() -> Dict[str, Any]:
+    return {
+        "total_events": 0,
+        "repos": set(),
+        "prs_processed": 0,
+        "fixes_applied": 0,
+        "total_violations_found": 0,
+        "total_violations_fixed": 0,
+        "warn_mode_events": 0,
+        "enforce_mode_events": 0,
+        "success_count": 0,
+        "failure_count": 0,
+        "runs": _new_run_stats(METRICS_MAX_EVENTS),
+    }
+
+
+_agg: Dict[str, Any] = _new_aggregates()
+
+
+def flush_metrics() -> None:
+    """Write run records queued by record_metric to the DB now."""
+    from core.db import flush_pending_writes
+    flush_pending_writes()
+
+
+def _intern(value: Any) -> Any:
+    """
+    Intern small closed-set strings (event types, modes, statuses, repos).
+
+    Stored events then share one string object per distinct value, and the
+    comparisons against literals in _aggregate hit the identity fast path.
+    """
+    return sys.intern(value) if type(value) is str else value
 
 
 def record_metric(
@@ -51,24 +120,32 @@ def record_metric(
         vuln_types: List of vulnerability category labels (e.g. ["SQLi", "XSS"])
     """
     metric = {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "event_type": event_type,
-        "repo": repo,
+        # Raw clock reading; formatted as ISO 8601 only when exported.
+        "timestamp_ns": time.time_ns(),
+        "event_type": _intern(event_type),
+        "repo": _intern(repo),
         "pr_number": pr_number,
         "violations_found": violations_found,
         "violations_fixed": violations_fixed,
-        "mode": mode,
-        "status": status,
+        "mode": _intern(mode),
+        "status": _intern(status),
         "metadata": metadata or {},
     }
     
-    _metrics_store.append(metric)
+    with _store_lock:
+        if METRICS_SPILL_PATH and _metrics_store and len(_metrics_store) == _metrics_store.maxlen:
+            _spilled.append(_metrics_store[0])
+            if len(_spilled) >= _SPILL_BATCH:
+                _write_spill()
+        _metrics_store.append(metric)
+        _aggregate(metric)
     
-    # Persist to DB for dashboard (when installation_id available)
+    # Persist to DB for dashboard (when installation_id available); queued
+    # so webhook handlers don't wait on a write per event.
     if installation_id is not None:
         try:
-            from core.db import insert_run
-            insert_run(
+            from core.db import queue_run
+            queue_run(
                 installation_id=installation_id,
                 repo=repo,
                 status=status,
@@ -77,9 +154,10 @@ def record_metric(
                 violations_fixed=violations_fixed,
                 correlation_id=correlation_id,
                 vuln_types=vuln_types,
+                timestamp=_iso(metric["timestamp_ns"]),
             )
         except Exception as e:
-            log_processing_result("metrics", "db_error", f"Failed to persist run: {e}")
+            logger.warning("Failed to persist run for %s: %s", repo, e)
 
     # Trigger notifications for notable events
     if installation_id is not None and event_type == "fix_applied":
@@ -97,149 +175,252 @@ def record_metric(
         except Exception:
             pass
     
-    # Also log for observability
-    log_processing_result(
-        "metrics",
+    # One audit event per metric (JSON log line, plus the audit table when
+    # enabled). Callers log their own processing results separately.
+    log_audit_event(
+        "metric_recorded",
         status,
-        f"Metric recorded: {event_type}",
-        metric,
+        correlation_id=correlation_id,
+        repo=repo,
+        pr_number=pr_number,
+        metadata={
+            "event_type": event_type,
+            "violations_found": violations_found,
+            "violations_fixed": violations_fixed,
+            "mode": mode,
+            "metadata": metric["metadata"],
+        },
     )
 
 
+# Column order of exported CSVs (the keys record_metric writes).
+_CSV_FIELDNAMES = (
+    "timestamp",
+    "event_type",
+    "repo",
+    "pr_number",
+    "violations_found",
+    "violations_fixed",
+    "mode",
+    "status",
+    "metadata",
+)
+
+
+def _iso(timestamp_ns: int) -> str:
+    """Format a time.time_ns() reading as an ISO 8601 UTC timestamp."""
+    seconds, ns = divmod(timestamp_ns, 1_000_000_000)
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(microsecond=ns // 1000).isoformat()
+
+
+def _csv_rows(metrics: Iterable[Dict]) -> Iterable[tuple]:
+    """Yield CSV rows as tuples, with metadata serialized to JSON."""
+    json_dumps = json.dumps
+    iso = _iso
+    for m in metrics:
+        md = m["metadata"]
+        yield (
+            iso(m["timestamp_ns"]),
+            m["event_type"],
+            m["repo"],
+            m["pr_number"],
+            m["violations_found"],
+            m["violations_fixed"],
+            m["mode"],
+            m["status"],
+            # Most events carry no metadata; skip the encoder for those.
+            json_dumps(md) if md else "{}",
+        )
+
+
+def _write_spill() -> None:
+    """Append evicted events to METRICS_SPILL_PATH (caller holds _store_lock)."""
+    if not _spilled or not METRICS_SPILL_PATH:
+        return
+    try:
+        new_file = not METRICS_SPILL_PATH.exists() or METRICS_SPILL_PATH.stat().st_size == 0
+        with open(METRICS_SPILL_PATH, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(_CSV_FIELDNAMES)
+            writer.writerows(_csv_rows(_spilled))
+    except OSError as e:
+        logger.warning("Failed to spill %d metric(s) to %s: %s", len(_spilled), METRICS_SPILL_PATH, e)
+    _spilled.clear()
+
+
 def export_metrics_csv(output_path: Path) -> bool:
     """
     Export metrics to CSV file.
     
+    Rows are streamed through csv.writer into a 1 MiB write buffer. Events
+    spilled to METRICS_SPILL_PATH come first, followed by those in memory.
+    A ``.gz`` output path is gzip-compressed (level 1) as it is written.
+    The spill file is copied under _store_lock so a concurrent spill can't
+    duplicate or truncate rows.
+    
     Args:
-        output_path: Path to write CSV file
+        output_path: Path to write CSV file (``.csv`` or ``.csv.gz``)
     
     Returns:
         True if successful
     """
-    if not _metrics_store:
-        return False
-    
     try:
-        with open(output_path, "w", newline="", encoding="utf-8") as f:
-            if not _metrics_store:
-                return False
-            
-            fieldnames = list(_metrics_store[0].keys())
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for metric in _metrics_store:
-                # Flatten metadata dict for CSV
-                row = metric.copy()
-                if row.get("metadata"):
-                    row["metadata"] = json.dumps(row["metadata"])
-                writer.writerow(row)
-        
+        with contextlib.ExitStack() as stack:
+            with _store_lock:
+                _write_spill()
+                metrics = list(_metrics_store)
+                spill_path = METRICS_SPILL_PATH if METRICS_SPILL_PATH and METRICS_SPILL_PATH.exists() else None
+                if not metrics and spill_path is None:
+                    return False
+
+                if Path(output_path).suffix == ".gz":
+                    out = gzip.open(output_path, "wt", compresslevel=1, newline="", encoding="utf-8")
+                else:
+                    out = open(output_path, "w", newline="", encoding="utf-8", buffering=1 << 20)
+                f = stack.enter_context(out)
+                writer = csv.writer(f)
+                writer.writerow(_CSV_FIELDNAMES)
+                if spill_path is not None:
+                    with open(spill_path, newline="", encoding="utf-8") as spilled:
+                        spilled.readline()  # header
+                        shutil.copyfileobj(spilled, f)
+            # In-memory events are a snapshot; format them without the lock
+            writer.writerows(_csv_rows(metrics))
+
         return True
     except Exception as e:
         logger.error("Error exporting metrics to CSV: %s", e)
         return False
 
 
+def _aggregate(metric: Dict) -> None:
+    """Fold one metric into the running totals (caller holds _store_lock)."""
+    agg = _agg
+    agg["total_events"] += 1
+    agg["repos"].add(metric["repo"])
+    agg["total_violations_found"] += metric["violations_found"] or 0
+    agg["total_violations_fixed"] += metric["violations_fixed"] or 0
+
+    event_type = metric["event_type"]
+    if event_type == "pr_processed":
+        agg["prs_processed"] += 1
+    elif event_type == "fix_applied":
+        agg["fixes_applied"] += 1
+    elif event_type == "run_completed":
+        _add_run(agg["runs"], metric)
+
+    mode = metric["mode"]
+    if mode == "warn":
+        agg["warn_mode_events"] += 1
+    elif mode == "enforce":
+        agg["enforce_mode_events"] += 1
+
+    status = metric["status"]
+    if status == "success":
+        agg["success_count"] += 1
+    elif status == "failure":
+        agg["failure_count"] += 1
+
+
 def generate_metrics_summary() -> Dict:
     """
     Generate summary statistics from metrics.
     
+    Reads the running totals maintained by record_metric, so the cost does
+    not grow with the number of recorded events. Runtime percentiles cover
+    the most recent FIXPOINT_METRICS_MAX runs.
+    
     Returns:
         Dict with summary statistics
     """
-    if not _metrics_store:
-        return {}
-    
-    total_events = len(_metrics_store)
-    repos = set(m.get("repo") for m in _metrics_store)
-    prs_processed = len([m for m in _metrics_store if m.get("event_type") == "pr_processed"])
-    fixes_applied = len([m for m in _metrics_store if m.get("event_type") == "fix_applied"])
-    
-    total_violations_found = sum(m.get("violations_found", 0) for m in _metrics_store)
-    total_violations_fixed = sum(m.get("violations_fixed", 0) for m in _metrics_store)
-    
-    warn_mode_count = len([m for m in _metrics_store if m.get("mode") == "warn"])
-    enforce_mode_count = len([m for m in _metrics_store if m.get("mode") == "enforce"])
-    
-    success_count = len([m for m in _metrics_store if m.get("status") == "success"])
-    failure_count = len([m for m in _metrics_store if m.get("status") == "failure"])
-    
-    run_summary = summarize_run_metrics(_metrics_store)
-
-    summary = {
-        "total_events": total_events,
-        "unique_repos": len(repos),
-        "prs_processed": prs_processed,
-        "fixes_applied": fixes_applied,
-        "total_violations_found": total_violations_found,
-        "total_violations_fixed": total_violations_fixed,
-        "fix_rate": total_violations_fixed / total_violations_found if total_violations_found > 0 else 0,
-        "warn_mode_events": warn_mode_count,
-        "enforce_mode_events": enforce_mode_count,
-        "success_rate": success_count / total_events if total_events > 0 else 0,
-        "failure_count": failure_count,
-    }
+    with _store_lock:
+        agg = _agg
+        total_events = agg["total_events"]
+        if not total_events:
+            return {}
+
+        found = agg["total_violations_found"]
+        fixed = agg["total_violations_fixed"]
+        summary = {
+            "total_events": total_events,
+            "unique_repos": len(agg["repos"]),
+            "prs_processed": agg["prs_processed"],
+            "fixes_applied": agg["fixes_applied"],
+            "total_violations_found": found,
+            "total_violations_fixed": fixed,
+            "fix_rate": fixed / found if found > 0 else 0,
+            "warn_mode_events": agg["warn_mode_events"],
+            "enforce_mode_events": agg["enforce_mode_events"],
+            "success_rate": agg["success_count"] / total_events,
+            "failure_count": agg["failure_count"],
+        }
+        run_summary = _run_summary(agg["runs"])
 
     summary.update(run_summary)
     return summary
 
 
-def _percentile(values: list[float], percentile: float) -> float:
+def _percentiles(values: Collection[float], percentiles: Iterable[float]) -> list[float]:
+    """Linearly interpolated percentiles of values, sorting them only once."""
     if not values:
-        return 0.0
+        return [0.0 for _ in percentiles]
     values_sorted = sorted(values)
-    k = (len(values_sorted) - 1) * (percentile / 100.0)
-    f = int(k)
-    c = min(f + 1, len(values_sorted) - 1)
-    if f == c:
-        return float(values_sorted[f])
-    return float(values_sorted[f] + (values_sorted[c] - values_sorted[f]) * (k - f))
+    last = len(values_sorted) - 1
+    result = []
+    for percentile in percentiles:
+        k = last * (percentile / 100.0)
+        f = int(k)
+        c = min(f + 1, last)
+        if f == c:
+            result.append(float(values_sorted[f]))
+        else:
+            result.append(float(values_sorted[f] + (values_sorted[c] - values_sorted[f]) * (k - f)))
+    return result
 
 
-def _iter_run_metrics(metrics: Iterable[Dict]) -> list[Dict]:
-    return [m for m in metrics if m.get("event_type") == "run_completed"]
+def _add_run(stats: Dict[str, Any], metric: Dict) -> None:
+    """Fold one run_completed metric into run stats from _new_run_stats()."""
+    md = metric.get("metadata") or {}
+    get = md.get
+    stats["run_count"] += 1
+    runtime = get("runtime_seconds")
+    if runtime is not None:
+        stats["runtimes"].append(float(runtime or 0))
+    stats["fixes_attempted"] += int(get("fixes_attempted") or 0)
+    stats["fixes_applied"] += int(get("fixes_applied") or 0)
 
+    reasons = get("degraded_reasons")
+    if reasons:
+        stats["degraded_to_warn_count"] += 1
+        stats["degraded_reasons"].update(map(str, reasons))
+    failure_reason = get("failure_reason")
+    if failure_reason:
+        stats["failure_reasons"][str(failure_reason)] += 1
 
-def summarize_run_metrics(metrics: Iterable[Dict]) -> Dict:
-    runs = _iter_run_metrics(metrics)
-    runtimes = [
-        float(m.get("metadata", {}).get("runtime_seconds", 0) or 0)
-        for m in runs
-        if (m.get("metadata") or {}).get("runtime_seconds") is not None
-    ]
-    fixes_attempted = sum(int((m.get("metadata") or {}).get("fixes_attempted", 0) or 0) for m in runs)
-    fixes_applied = sum(int((m.get("metadata") or {}).get("fixes_applied", 0) or 0) for m in runs)
-
-    degraded_count = 0
-    degraded_reasons: Dict[str, int] = {}
-    failure_reasons: Dict[str, int] = {}
-
-    for m in runs:
-        md = m.get("metadata", {}) or {}
-        reasons = md.get("degraded_reasons") or []
-        if reasons:
-            degraded_count += 1
-            for r in reasons:
-                key = str(r)
-                degraded_reasons[key] = degraded_reasons.get(key, 0) + 1
-        failure_reason = md.get("failure_reason")
-        if failure_reason:
-            key = str(failure_reason)
-            failure_reasons[key] = failure_reasons.get(key, 0) + 1
 
+def _run_summary(stats: Dict[str, Any]) -> Dict:
+    runtime_p50, runtime_p95 = _percentiles(stats["runtimes"], (50, 95))
     return {
-        "run_count": len(runs),
-        "runtime_p50": _percentile(runtimes, 50),
-        "runtime_p95": _percentile(runtimes, 95),
-        "fixes_attempted": fixes_attempted,
-        "fixes_applied": fixes_applied,
-        "degraded_to_warn_count": degraded_count,
-        "degraded_reasons": degraded_reasons,
-        "failure_reasons": failure_reasons,
+        "run_count": stats["run_count"],
+        "runtime_p50": runtime_p50,
+        "runtime_p95": runtime_p95,
+        "fixes_attempted": stats["fixes_attempted"],
+        "fixes_applied": stats["fixes_applied"],
+        "degraded_to_warn_count": stats["degraded_to_warn_count"],
+        "degraded_reasons": dict(stats["degraded_reasons"]),
+        "failure_reasons": dict(stats["failure_reasons"]),
     }
 
 
+def summarize_run_metrics(metrics: Iterable[Dict]) -> Dict:
+    stats = _new_run_stats()
+    for m in metrics:
+        if m.get("event_type") == "run_completed":
+            _add_run(stats, m)
+    return _run_summary(stats)
+
+
 def generate_email_report() -> str:
     """
     Generate email report text from metrics.
@@ -276,6 +457,14 @@ def generate_email_report() -> str:
 
 
 def clear_metrics():
-    """Clear metrics store (for testing)."""
-    global _metrics_store
-    _metrics_store.clear()
+    """Clear metrics store and the spill file (for testing)."""
+    global _agg
+    with _store_lock:
+        _metrics_store.clear()
+        _spilled.clear()
+        _agg = _new_aggregates()
+        if METRICS_SPILL_PATH:
+            try:
+                METRICS_SPILL_PATH.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning("Failed to remove metrics spill file %s: %s", METRICS_SPILL_PATH, e)
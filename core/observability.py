@@ -11,14 +11,26 @@ from __future__ import annotations
 import logging
 import json
 import os
+import re
 from datetime import datetime, timezone
 import uuid
+from contextvars import ContextVar
 from typing import Optional, Dict, Any
 
+try:  # pragma: no cover - optional dependency surface
+    import orjson
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore
+
+# Current correlation ID. A ContextVar is per-thread and per-asyncio-task,
+# so concurrent webhook handlers never see each other's IDs.
+_correlation_id: ContextVar[str] = ContextVar("correlation_id", default="no-id")
+
+
 # Configure structured logging with correlation ID support
 class CorrelationIDFilter(logging.Filter):
     def filter(self, record):
-        record.correlation_id = getattr(logging, '_correlation_id', 'no-id')
+        record.correlation_id = _correlation_id.get()
         return True
 
 logging.basicConfig(
@@ -39,20 +51,15 @@ class CorrelationContext:
     
     def __init__(self, correlation_id: Optional[str] = None):
         self.correlation_id = correlation_id or str(uuid.uuid4())
-        self.old_id = None
+        self._token = None
     
     def __enter__(self):
-        # Store old correlation ID if any
-        self.old_id = getattr(logging, '_correlation_id', None)
-        logging._correlation_id = self.correlation_id
+        self._token = _correlation_id.set(self.correlation_id)
         return self
     
     def __exit__(self, *args):
-        # Restore old correlation ID
-        if self.old_id:
-            logging._correlation_id = self.old_id
-        else:
-            delattr(logging, '_correlation_id')
+        # Restore the previous correlation ID (or the default)
+        _correlation_id.reset(self._token)
 
 
 _REDACT_KEYS = {
@@ -65,6 +72,24 @@ _REDACT_KEYS = {
     "private_key",
     "password",
 }
+_REDACT_NEEDLES = ("token", "secret", "password", "authorization")
+# One C-level scan per key instead of a Python loop over the needles.
+_REDACT_SEARCH = re.compile("|".join(_REDACT_NEEDLES)).search
+
+
+def _dumps(obj: Any) -> str:
+    """
+    Serialize to a compact JSON string, keeping insertion order.
+
+    Uses orjson (C-level encoder) when installed, falling back to the
+    standard library for values orjson rejects or when it is missing.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
 
 
 def _redact(obj: Any) -> Any:
@@ -74,7 +99,7 @@ def _redact(obj: Any) -> Any:
             redacted: dict[str, Any] = {}
             for k, v in obj.items():
                 key = str(k).lower()
-                if key in _REDACT_KEYS or any(s in key for s in ("token", "secret", "password", "authorization")):
+                if key in _REDACT_KEYS or _REDACT_SEARCH(key):
                     redacted[k] = "[REDACTED]"
                 else:
                     redacted[k] = _redact(v)
@@ -91,6 +116,11 @@ def _redact(obj: Any) -> Any:
         return "[UNSERIALIZABLE]"
 
 
+def _env_flag_enabled(raw: str) -> bool:
+    """Parse an on-by-default env flag value ("0"/"false"/"no" disable it)."""
+    return raw.lower() not in ("0", "false", "no")
+
+
 def log_audit_event(
     action: str,
     result: str,
@@ -107,37 +137,39 @@ def log_audit_event(
     - Optionally persists to SQLite if FIXPOINT_AUDIT_LOG_DB=true.
     """
     ts = datetime.now(timezone.utc).isoformat()
-    cid = correlation_id or getattr(logging, "_correlation_id", "no-id")
-
-    event = {
-        "type": "audit",
-        "timestamp": ts,
-        "correlation_id": cid,
-        "action": str(action),
-        "result": str(result),
-        "repo": repo,
-        "pr_number": pr_number,
-        "metadata": _redact(metadata or {}),
-    }
+    cid = correlation_id or _correlation_id.get()
+
+    # Metadata is serialized once and reused for the log line and the DB row.
+    metadata_json = _dumps(_redact(metadata)) if metadata else "{}"
 
     # Emit as a single JSON line (works with most log shippers)
-    with CorrelationContext(cid):
-        logger.info(json.dumps(event, ensure_ascii=False, sort_keys=True))
+    if logger.isEnabledFor(logging.INFO):
+        envelope = _dumps({
+            "type": "audit",
+            "timestamp": ts,
+            "correlation_id": cid,
+            "action": str(action),
+            "result": str(result),
+            "repo": repo,
+            "pr_number": pr_number,
+        })
+        with CorrelationContext(cid):
+            logger.info("%s,\"metadata\":%s}", envelope[:-1], metadata_json)
 
     # Persist to DB (best-effort — never breaks runtime).
     # Can be disabled with RAILO_AUDIT_LOG_DB=false for unit tests.
-    if os.getenv("RAILO_AUDIT_LOG_DB", "1").lower() not in ("0", "false", "no"):
+    if _env_flag_enabled(os.getenv("RAILO_AUDIT_LOG_DB", "1")):
         try:
-            from core.db import insert_audit_log
+            from core.db import queue_audit_log
 
-            insert_audit_log(
+            queue_audit_log(
                 action=str(action),
                 timestamp=ts,
                 correlation_id=cid,
                 repo=repo,
                 pr_number=pr_number,
                 result=str(result),
-                metadata_json=json.dumps(event.get("metadata", {}), ensure_ascii=False, sort_keys=True),
+                metadata_json=metadata_json,
             )
         except Exception:
             # Never break runtime due to audit persistence
@@ -190,6 +222,10 @@ def log_webhook_event(
     return correlation_id
 
 
+# Attributes of LogRecord that may not be passed through `extra`.
+_LOG_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+
 def log_processing_result(
     correlation_id: str,
     status: str,
@@ -197,22 +233,28 @@ def log_processing_result(
     metadata: Optional[Dict[str, Any]] = None,
 ):
     """Log processing result with structured data."""
-    with CorrelationContext(correlation_id):
-        log_data = {
-            "status": status,
-            "msg": message or "",  # avoid shadowing LogRecord reserved 'message' attr
-        }
-        if metadata:
-            # Rename 'message' key in metadata to avoid logging conflict
-            safe_meta = {("msg" if k == "message" else k): v for k, v in metadata.items()}
-            log_data.update(safe_meta)
-        
-        if status == "error":
-            logger.error(f"Processing failed: {message}", extra=log_data)
-        elif status == "success":
-            logger.info(f"Processing succeeded: {message}", extra=log_data)
-        else:
-            logger.info(f"Processing: {message}", extra=log_data)
+    level = logging.ERROR if status == "error" else logging.INFO
+    if logger.isEnabledFor(level):
+        with CorrelationContext(correlation_id):
+            log_data = {
+                "status": status,
+                "detail": message or "",  # 'msg'/'message' are reserved LogRecord attrs
+            }
+            if metadata:
+                # Rename keys that would collide with LogRecord attributes
+                # (logging raises KeyError for those in `extra`).
+                safe_meta = {
+                    ("detail" if k == "message" else f"meta_{k}" if k in _LOG_RECORD_ATTRS else k): v
+                    for k, v in metadata.items()
+                }
+                log_data.update(safe_meta)
+
+            if status == "error":
+                logger.error("Processing failed: %s", message, extra=log_data)
+            elif status == "success":
+                logger.info("Processing succeeded: %s", message, extra=log_data)
+            else:
+                logger.info("Processing: %s", message, extra=log_data)
 
     # Audit trail (structured)
     pr_val = (metadata or {}).get("pr_number")
@@ -229,7 +271,7 @@ def log_processing_result(
         action="processing_result",
         result=str(status),
         correlation_id=correlation_id,
-        repo=log_data.get("repo"),
+        repo=(metadata or {}).get("repo"),
         pr_number=pr_num,
         metadata={"message": message, **(metadata or {})},
     )
@@ -244,7 +286,8 @@ def log_fix_applied(
     """Log when fixes are applied."""
     with CorrelationContext(correlation_id):
         logger.info(
-            f"Fixes applied to PR #{pr_number}",
+            "Fixes applied to PR #%s",
+            pr_number,
             extra={
                 "pr_number": pr_number,
                 "files_fixed": files_fixed,
@@ -22,10 +22,13 @@ class PatchPlan:
     - which files are likely to change
     - which rules/check_ids are involved
     so that safety guardrails can decide whether enforce mode is allowed.
+
+    Only the number of findings is kept; the raw Semgrep results (with
+    their metadata) are not retained by the plan.
     """
 
     repo_path: Path
-    findings: List[Dict[str, Any]]
+    findings_count: int
     target_files: List[str]
     rules: List[str]
 
@@ -64,26 +67,30 @@ def generate_patch_plan(
     """
     repo_path = Path(repo_path)
 
-    files_set = set()
+    # Findings often repeat the same path; resolve each raw path once.
+    rel_paths: Dict[str, str] = {}
     rules_set = set()
+    findings_count = 0
 
     for finding in findings or []:
+        findings_count += 1
         raw_path = finding.get("path")
         if not raw_path:
             continue
-        rel_path = _relative_path(repo_path, raw_path)
-        files_set.add(rel_path)
+        if raw_path not in rel_paths:
+            rel_paths[raw_path] = _relative_path(repo_path, raw_path)
 
         check_id = finding.get("check_id")
         if check_id:
             rules_set.add(str(check_id))
 
-    target_files = sorted(files_set)
+    # Sorted so patch-plan.json and safety reports are deterministic.
+    target_files = sorted(set(rel_paths.values()))
     rules = sorted(rules_set)
 
     return PatchPlan(
         repo_path=repo_path,
-        findings=list(findings or []),
+        findings_count=findings_count,
         target_files=target_files,
         rules=rules,
     )
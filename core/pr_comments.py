@@ -7,7 +7,8 @@ from __future__ import annotations
 import logging
 import os
 import re
-from typing import Optional
+from functools import lru_cache
+from typing import Callable, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,6 +16,112 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=8)
+def _github_client(token: str):
+    """Return a PyGithub client for *token*, reused across comment calls."""
+    # Lazy import so local/dev/test environments without PyGithub can still import the module.
+    from github import Github, Auth  # type: ignore
+
+    return Github(auth=Auth.Token(token), per_page=100)
+
+
+def _post_comment(token: str, owner: str, repo: str, pr_number: int, body: str) -> str:
+    """
+    Post *body* as a new PR comment and return its URL.
+
+    The issue-comments endpoint only needs the PR number, so this calls it
+    directly through the client's requester without fetching the repo or
+    pull request first, and reads html_url from the response.
+    """
+    _, data = _github_client(token).requester.requestJsonAndCheck(
+        "POST",
+        f"/repos/{owner}/{repo}/issues/{pr_number}/comments",
+        input={"body": body},
+    )
+    return data.get("html_url", "")
+
+
+# Hidden first line of warn comments, so a re-run on the same commit can
+# find and update its comment.
+_SHA_MARKER = "<!-- railo:sha={} -->"
+
+# How many of a PR's newest comments the idempotency lookup inspects.
+_RECENT_COMMENTS = 20
+
+_RECENT_COMMENTS_QUERY = """
+query($owner: String!, $name: String!, $number: Int!, $last: Int!) {
+  repository(owner: $owner, name: $name) {
+    pullRequest(number: $number) {
+      comments(last: $last) { nodes { databaseId body } }
+    }
+  }
+}
+"""
+
+
+# rel="last" entry of a REST Link header
+_LAST_PAGE_RE = re.compile(r'<([^>]+)>;\s*rel="last"')
+
+
+def _find_comment(token: str, owner: str, repo: str, pr_number: int, matches: Callable[[str], bool]) -> Optional[int]:
+    """
+    Return the id of the most recent PR comment whose body satisfies *matches*, or None.
+
+    Only the newest ``_RECENT_COMMENTS`` comments are checked, fetched with
+    a single GraphQL query. If that query fails, REST is used instead: the
+    first page of 100 comments, or the last page when the PR has more.
+    """
+    requester = _github_client(token).requester
+    try:
+        _, data = requester.requestJsonAndCheck(
+            "POST",
+            "/graphql",
+            input={
+                "query": _RECENT_COMMENTS_QUERY,
+                "variables": {"owner": owner, "name": repo, "number": pr_number, "last": _RECENT_COMMENTS},
+            },
+        )
+        recent = [
+            (node.get("databaseId"), node.get("body"))
+            for node in data["data"]["repository"]["pullRequest"]["comments"]["nodes"]
+        ]
+    except Exception as e:
+        logger.debug("GraphQL comment lookup failed, falling back to REST: %s", e)
+        headers, data = requester.requestJsonAndCheck(
+            "GET",
+            f"/repos/{owner}/{repo}/issues/{pr_number}/comments",
+            parameters={"per_page": 100},
+        )
+        last_page = _LAST_PAGE_RE.search(headers.get("link") or "")
+        if last_page:
+            _, data = requester.requestJsonAndCheck("GET", last_page.group(1))
+        recent = [(c.get("id"), c.get("body")) for c in data[-_RECENT_COMMENTS:]]
+
+    for comment_id, body in reversed(recent):
+        if comment_id and matches(body or ""):
+            return comment_id
+    return None
+
+
+def _update_comment(token: str, owner: str, repo: str, comment_id: int, body: str) -> str:
+    """Replace the body of an existing PR comment and return its URL."""
+    _, data = _github_client(token).requester.requestJsonAndCheck(
+        "PATCH",
+        f"/repos/{owner}/{repo}/issues/comments/{comment_id}",
+        input={"body": body},
+    )
+    return data.get("html_url", "")
+
+
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+# Characters that have special meaning in markdown, each escaped with a backslash
+_MD_ESCAPE_TABLE = str.maketrans({c: f'\\{c}' for c in '\\`*_{}[]()#+-.!|'})
+
+# Any character the HTML strip or the escape table would touch
+_MD_UNSAFE_RE = re.compile(r'[<\\`*_{}\[\]()#+\-.!|]')
+
+
 def _sanitize_for_markdown(text: str, max_length: int = 500) -> str:
     """
     Sanitize text for safe inclusion in GitHub markdown comments.
@@ -37,14 +144,14 @@ def _sanitize_for_markdown(text: str, max_length: int = 500) -> str:
     # Convert to string if needed
     text = str(text)
     
-    # Strip HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
-    
-    # Escape markdown special characters
-    # Characters that have special meaning in markdown
-    special_chars = ['\\', '`', '*', '_', '{', '}', '[', ']', '(', ')', '#', '+', '-', '.', '!', '|']
-    for char in special_chars:
-        text = text.replace(char, f'\\{char}')
+    # Plain text (the common case) needs no stripping or escaping
+    if _MD_UNSAFE_RE.search(text):
+        # Strip HTML tags
+        if '<' in text:
+            text = _HTML_TAG_RE.sub('', text)
+        
+        # Escape markdown special characters in a single pass
+        text = text.translate(_MD_ESCAPE_TABLE)
     
     # Truncate if too long
     if len(text) > max_length:
@@ -53,10 +160,19 @@ def _sanitize_for_markdown(text: str, max_length: int = 500) -> str:
     return text
 
 
+_PATH_NULL_TABLE = str.maketrans("", "", "\x00")
+
+# Runs of two or more dots, removed whole (so "..." leaves no "." behind)
+_DOT_RUN_RE = re.compile(r'\.{2,}')
+
+
+@lru_cache(maxsize=256)
 def _sanitize_file_path(path: str) -> str:
     """
     Sanitize file path for display in comments.
     
+    Cached, since findings in one comment often share a file.
+    
     Args:
         path: File path to sanitize
     
@@ -66,11 +182,13 @@ def _sanitize_file_path(path: str) -> str:
     if not path:
         return ""
     
-    # Remove any path traversal attempts
-    path = path.replace("..", "")
+    # Remove null bytes first, so ".\x00." can't turn into ".."
+    if "\x00" in path:
+        path = path.translate(_PATH_NULL_TABLE)
     
-    # Remove null bytes
-    path = path.replace("\x00", "")
+    # Remove any path traversal attempts
+    if ".." in path:
+        path = _DOT_RUN_RE.sub("", path)
     
     # Limit length
     if len(path) > 200:
@@ -94,7 +212,8 @@ def _sanitize_code_block(code: str, max_length: int = 1000) -> str:
         return ""
     
     # Remove backticks that could break out of code block
-    code = code.replace("```", "'''")
+    if "```" in code:
+        code = code.replace("```", "'''")
     
     # Truncate if too long
     if len(code) > max_length:
@@ -136,26 +255,51 @@ def _confidence_bar(pct: float) -> str:
     return f"`{bar}` {pct:.0f}%"
 
 
+# Checked in order; the first group with a needle in the check ID wins.
+_VULN_LABELS: tuple[tuple[tuple[str, ...], str], ...] = (
+    (("sql",), "SQL Injection"),  # also covers "sqli"
+    (("xss", "mark-safe", "innerhtml", "dom"), "XSS"),
+    (("secret", "password", "hardcoded", "token"), "Hardcoded Secret"),
+    (("command", "os-system", "subprocess"), "Command Injection"),
+    (("path", "traversal"), "Path Traversal"),
+    (("ssrf",), "SSRF"),
+    (("eval",), "Dangerous eval"),
+)
+
+
+@lru_cache(maxsize=256)
 def _vuln_label(check_id: str) -> str:
-    """Map a Semgrep check ID to a short human label."""
+    """Map a Semgrep check ID to a short human label (cached per check ID)."""
     cid = check_id.lower()
-    if "sql" in cid or "sqli" in cid:
-        return "SQL Injection"
-    if "xss" in cid or "mark-safe" in cid or "innerhtml" in cid or "dom" in cid:
-        return "XSS"
-    if "secret" in cid or "password" in cid or "hardcoded" in cid or "token" in cid:
-        return "Hardcoded Secret"
-    if "command" in cid or "os-system" in cid or "subprocess" in cid:
-        return "Command Injection"
-    if "path" in cid or "traversal" in cid:
-        return "Path Traversal"
-    if "ssrf" in cid:
-        return "SSRF"
-    if "eval" in cid:
-        return "Dangerous eval"
+    for needles, label in _VULN_LABELS:
+        for needle in needles:
+            if needle in cid:
+                return label
     return "Security Issue"
 
 
+def _findings_row(finding: dict) -> str:
+    """One ``| File | Issue | Line | Confidence |`` table row for a finding."""
+    c = _extract_confidence(finding)
+    return (
+        f"| `{_sanitize_file_path(finding.get('path', ''))}` "
+        f"| {_vuln_label(str(finding.get('check_id', '')))} "
+        f"| {(finding.get('start') or {}).get('line', '')} "
+        f"| {f'{c:.0f}%' if c is not None else '—'} |\n"
+    )
+
+
+def _findings_table(findings: list[dict]) -> str:
+    """Markdown table of findings (header included) for fix and warn comments."""
+    return "".join(
+        [
+            "| File | Issue | Line | Confidence |\n",
+            "|------|-------|------|-----------|\n",
+            *map(_findings_row, findings),
+        ]
+    )
+
+
 def generate_welcome_comment(owner: str, repo: str) -> str:
     """
     One-time orientation comment posted on a repo's first Railo scan.
@@ -287,17 +431,18 @@ def create_fix_comment(
     safety_snippet: Optional[str] = None,
     token: Optional[str] = None,
 ) -> str:
-    """Post a comment on the original PR summarising what enforce-mode fixed."""
+    """
+    Post a comment on the original PR summarising what enforce-mode fixed.
+
+    Nothing is posted (and no API call is made) when there are no findings
+    and no fixed files.
+    """
+    if not findings and not files_fixed:
+        return ""
     token = token or os.getenv("GITHUB_TOKEN")
     if not token:
         return ""
     try:
-        from github import Github, Auth  # type: ignore
-
-        g = Github(auth=Auth.Token(token))
-        r = g.get_repo(f"{owner}/{repo}")
-        pr = r.get_pull(pr_number)
-
         total_findings = len(findings)
         total_files = len(files_fixed)
 
@@ -305,47 +450,34 @@ def create_fix_comment(
         confs = [c for f in findings for c in [_extract_confidence(f)] if c is not None]
         avg_conf = round(sum(confs) / len(confs), 1) if confs else None
 
-        comment_body = f"## ✅ Railo fixed {total_findings} security issue(s)\n\n"
-        comment_body += f"Patched `{total_findings}` finding(s) across `{total_files}` file(s). "
-        comment_body += "Your branch now contains the fixes.\n\n"
+        parts: list[str] = [
+            f"## ✅ Railo fixed {total_findings} security issue(s)\n\n"
+            f"Patched `{total_findings}` finding(s) across `{total_files}` file(s). "
+            "Your branch now contains the fixes.\n\n"
+        ]
 
         if avg_conf is not None:
-            comment_body += f"**Fix confidence:** {_confidence_bar(avg_conf)}\n\n"
+            parts.append(f"**Fix confidence:** {_confidence_bar(avg_conf)}\n\n")
 
         if safety_snippet:
-            comment_body += f"> {safety_snippet}\n\n"
+            parts.append(f"> {safety_snippet}\n\n")
 
         # Findings table
         if findings:
-            comment_body += "### What was fixed\n\n"
-            comment_body += "| File | Issue | Line | Confidence |\n"
-            comment_body += "|------|-------|------|-----------|\n"
-            for f in findings:
-                fp = _sanitize_file_path(f.get("path", ""))
-                ln = (f.get("start") or {}).get("line", "")
-                label = _vuln_label(str(f.get("check_id", "")))
-                c = _extract_confidence(f)
-                conf_str = f"{c:.0f}%" if c is not None else "—"
-                comment_body += f"| `{fp}` | {label} | {ln} | {conf_str} |\n"
-            comment_body += "\n"
+            parts.append(f"### What was fixed\n\n{_findings_table(findings)}\n")
 
         # Patch preview — top N hunks
         if patch_hunks:
             limited = patch_hunks[: max_hunks if max_hunks > 0 else 5]
-            comment_body += "<details>\n"
-            comment_body += "<summary><strong>Patch preview</strong></summary>\n\n"
-            for hunk in limited:
-                safe_hunk = _sanitize_code_block(hunk, max_length=1200)
-                comment_body += "```diff\n" + safe_hunk + "\n```\n\n"
+            parts.append("<details>\n<summary><strong>Patch preview</strong></summary>\n\n")
+            parts.extend(f"```diff\n{_sanitize_code_block(hunk, max_length=1200)}\n```\n\n" for hunk in limited)
             if len(patch_hunks) > len(limited):
-                comment_body += f"_Showing {len(limited)} of {len(patch_hunks)} hunks._\n\n"
-            comment_body += "</details>\n\n"
+                parts.append(f"_Showing {len(limited)} of {len(patch_hunks)} hunks._\n\n")
+            parts.append("</details>\n\n")
 
-        comment_body += "---\n"
-        comment_body += "_Railo — automated security fixes. Please review before merging._"
+        parts.append("---\n_Railo — automated security fixes. Please review before merging._")
 
-        comment = pr.create_issue_comment(comment_body)
-        return comment.html_url
+        return _post_comment(token, owner, repo, pr_number, "".join(parts))
     except Exception as e:
         logger.warning("Failed to post fix comment: %s", e)
         return ""
@@ -366,6 +498,7 @@ def create_warn_comment(
     Create a PR comment in warn mode (propose fixes without applying).
     
     Implements idempotency: updates existing comment for same SHA instead of creating duplicates.
+    Nothing is posted when there are no findings and no proposed fixes.
     
     Args:
         owner: Repository owner
@@ -378,28 +511,30 @@ def create_warn_comment(
         token: Optional GitHub token override; falls back to GITHUB_TOKEN env var
     
     Returns:
-        Comment URL or empty string if failed
+        Comment URL or empty string if failed (or if there was nothing to report)
     """
+    if not findings and not proposed_fixes:
+        return ""
     token = token or os.getenv("GITHUB_TOKEN")
     if not token:
         return ""
     
     try:
-        # Lazy import so local/dev/test environments without PyGithub can still import the module.
-        from github import Github, Auth  # type: ignore
-
-        g = Github(auth=Auth.Token(token))
-        r = g.get_repo(f"{owner}/{repo}")
-        pr = r.get_pull(pr_number)
+        sha8 = head_sha[:8] if head_sha else ""
+        marker = _SHA_MARKER.format(sha8) if sha8 else ""
 
         # IDEMPOTENCY: Check for existing Railo comment for this SHA
-        existing_comment = None
-        if head_sha:
-            comments = pr.get_issue_comments()
-            for comment in comments:
-                if "Railo" in comment.body and head_sha[:8] in comment.body:
-                    existing_comment = comment
-                    break
+        existing_comment_id = None
+        if marker:
+            existing_comment_id = _find_comment(
+                token,
+                owner,
+                repo,
+                pr_number,
+                # Our comments start with the marker; ones posted before it
+                # existed match on content (rarer SHA test first).
+                lambda body: body.startswith(marker) or (sha8 in body and "Railo" in body),
+            )
 
         total_findings = len(findings)
         _total_proposals = len(proposed_fixes)  # noqa: F841
@@ -409,21 +544,24 @@ def create_warn_comment(
         avg_conf = round(sum(confs) / len(confs), 1) if confs else None
 
         # --- Header: simple and scannable ---
-        comment_body = f"## 🔍 Railo found {total_findings} security issue(s)\n\n"
+        parts: list[str] = [f"{marker}\n"] if marker else []
+        parts.append(f"## 🔍 Railo found {total_findings} security issue(s)\n\n")
 
         # Scores inline
-        score_line = "Your branch is **unchanged**."  
         if avg_conf is not None:
-            score_line += f"  Fix confidence: {_confidence_bar(avg_conf)}"
-        comment_body += score_line + "\n\n"
+            parts.append(f"Your branch is **unchanged**.  Fix confidence: {_confidence_bar(avg_conf)}\n\n")
+        else:
+            parts.append("Your branch is **unchanged**.\n\n")
 
         # Optional trust-contract safety decision snippet
         if safety_snippet:
-            comment_body += f"> {safety_snippet}\n\n"
+            parts.append(f"> {safety_snippet}\n\n")
 
         # --- Before/After blocks — the main content ---
         if proposed_fixes:
-            comment_body += "### Proposed fixes\n\n"
+            parts.append("### Proposed fixes\n\n")
+            # First finding per path, built on first use for the confidence fallback
+            first_by_path: dict | None = None
             for fix in proposed_fixes:
                 file_path = _sanitize_file_path(fix.get("file", ""))
                 line = int(fix.get("line", 0))
@@ -434,58 +572,51 @@ def create_warn_comment(
                 conf = fix.get("confidence")
                 # Per-fix confidence — fall back to finding metadata
                 if conf is None and findings:
-                    for f in findings:
-                        if f.get("path", "") == file_path:
-                            conf = _extract_confidence(f)
-                            break
+                    if first_by_path is None:
+                        first_by_path = {}
+                        for f in findings:
+                            first_by_path.setdefault(f.get("path", ""), f)
+                    match = first_by_path.get(file_path)
+                    if match is not None:
+                        conf = _extract_confidence(match)
 
                 header = f"`{file_path}`" + (f" line {line}" if line else "")
                 if conf is not None:
                     header += f" — confidence {_confidence_bar(float(conf))}"
-                comment_body += f"**{vuln}** · {header}\n\n"
-                comment_body += "**Before:**\n"
-                comment_body += f"```python\n{before}\n```\n"
-                comment_body += "**After:**\n"
-                comment_body += f"```python\n{after}\n```\n\n"
+                parts.append(
+                    f"**{vuln}** · {header}\n\n"
+                    f"**Before:**\n```python\n{before}\n```\n"
+                    f"**After:**\n```python\n{after}\n```\n\n"
+                )
         else:
             # Fallback: findings table
-            comment_body += "### What was found\n\n"
-            comment_body += "| File | Issue | Line | Confidence |\n"
-            comment_body += "|------|-------|------|-----------|\n"
-            for f in findings:
-                fp = _sanitize_file_path(f.get("path", ""))
-                ln = (f.get("start") or {}).get("line", "")
-                label = _vuln_label(str(f.get("check_id", "")))
-                c = _extract_confidence(f)
-                conf_str = f"{c:.0f}%" if c is not None else "—"
-                comment_body += f"| `{fp}` | {label} | {ln} | {conf_str} |\n"
-            comment_body += "\n"
+            parts.append(f"### What was found\n\n{_findings_table(findings)}\n")
 
         # --- How to apply / next steps ---
-        comment_body += "### Apply these fixes\n\n"
-        comment_body += "| Option | How |\n"
-        comment_body += "|--------|-----|\n"
-        comment_body += "| **Auto-apply** | Switch to `fix` mode and Railo opens a fix PR automatically |\n"
-        comment_body += "| **Apply manually** | Copy the diffs above into your editor |\n"
-        comment_body += "| **Dismiss** | Add `# railo: ignore` on the flagged line |\n"
-        comment_body += "\n"
+        parts.append(
+            "### Apply these fixes\n\n"
+            "| Option | How |\n"
+            "|--------|-----|\n"
+            "| **Auto-apply** | Switch to `fix` mode and Railo opens a fix PR automatically |\n"
+            "| **Apply manually** | Copy the diffs above into your editor |\n"
+            "| **Dismiss** | Add `# railo: ignore` on the flagged line |\n"
+            "\n"
+        )
 
         if fork_notice:
-            comment_body += fork_notice + "\n\n"
+            parts.append(f"{fork_notice}\n\n")
 
-        if head_sha:
-            comment_body += f"\n\n*Commit: `{head_sha[:8]}`*"
+        if sha8:
+            parts.append(f"\n\n*Commit: `{sha8}`*")
 
-        comment_body += "\n---\n"
-        comment_body += "_Railo — automated security fixes. Your branch was not modified._"
+        parts.append("\n---\n_Railo — automated security fixes. Your branch was not modified._")
+        comment_body = "".join(parts)
 
         # IDEMPOTENCY: Update existing comment or create new one
-        if existing_comment:
-            existing_comment.edit(comment_body)
-            return existing_comment.html_url
+        if existing_comment_id:
+            return _update_comment(token, owner, repo, existing_comment_id, comment_body)
         else:
-            comment = pr.create_issue_comment(comment_body)
-            return comment.html_url
+            return _post_comment(token, owner, repo, pr_number, comment_body)
         
     except Exception as e:
         logger.warning("Failed to post warn comment: %s", e)
@@ -517,38 +648,34 @@ def create_error_comment(
         return ""
     
     try:
-        # Lazy import so local/dev/test environments without PyGithub can still import the module.
-        from github import Github, Auth  # type: ignore
-
-        g = Github(auth=Auth.Token(token))
-        r = g.get_repo(f"{owner}/{repo}")
-        pr = r.get_pull(pr_number)
-
         safe_message = _sanitize_for_markdown(message)
 
-        comment_body = "## ⚠️ Railo — Action Required\n\n"
-
         if error_type == "permissions":
-            comment_body += "Railo detected security issues but **couldn't open a fix PR** due to permission issues.\n\n"
-            comment_body += "**Action required:** Ensure the Railo GitHub App token has `contents: write` on this repository.\n\n"
+            reason = (
+                "Railo detected security issues but **couldn't open a fix PR** due to permission issues.\n\n"
+                "**Action required:** Ensure the Railo GitHub App token has `contents: write` on this repository.\n\n"
+            )
         elif error_type == "branch_protection":
-            comment_body += "Railo detected security issues but **couldn't push the fix branch** due to branch protection rules.\n\n"
-            comment_body += "**Action required:** Allow Railo's token to push to this repository, or apply the suggested fixes manually from the check-run annotations.\n\n"
+            reason = (
+                "Railo detected security issues but **couldn't push the fix branch** due to branch protection rules.\n\n"
+                "**Action required:** Allow Railo's token to push to this repository, or apply the suggested fixes manually from the check-run annotations.\n\n"
+            )
         else:
-            comment_body += "Railo detected security issues but encountered an unexpected problem while preparing the fix PR.\n\n"
-
-        comment_body += f"**Details:** {safe_message}\n\n"
-
-        comment_body += "### Suggested next steps\n\n"
-        comment_body += "- Review the check-run annotations on the **Files changed** tab for affected lines.\n"
-        comment_body += "- Verify the Railo GitHub App has the required repository permissions.\n"
-        comment_body += "- See the [Railo docs](https://app.railo.dev/docs) for the permissions required.\n\n"
-
-        comment_body += "---\n"
-        comment_body += "_Railo — automated security fixes._"
-
-        comment = pr.create_issue_comment(comment_body)
-        return comment.html_url
+            reason = "Railo detected security issues but encountered an unexpected problem while preparing the fix PR.\n\n"
+
+        comment_body = (
+            "## ⚠️ Railo — Action Required\n\n"
+            f"{reason}"
+            f"**Details:** {safe_message}\n\n"
+            "### Suggested next steps\n\n"
+            "- Review the check-run annotations on the **Files changed** tab for affected lines.\n"
+            "- Verify the Railo GitHub App has the required repository permissions.\n"
+            "- See the [Railo docs](https://app.railo.dev/docs) for the permissions required.\n\n"
+            "---\n"
+            "_Railo — automated security fixes._"
+        )
+
+        return _post_comment(token, owner, repo, pr_number, comment_body)
         
     except Exception as e:
         logger.warning("Failed to post error comment: %s", e)
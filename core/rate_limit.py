@@ -5,15 +5,26 @@ Prevents DDoS on synchronize storms.
 from __future__ import annotations
 
 import os
+import threading
 import time
-from collections import defaultdict
 from typing import Dict, Tuple
 
 from core.cache import get_redis_client
 
 
-# In-memory rate limit store (in production, use Redis)
-_rate_limit_store: Dict[str, list[float]] = defaultdict(list)
+# In-memory rate limit store (in production, use Redis): a token bucket per
+# key, stored as (tokens, last_refill). Buckets hold up to max_requests
+# tokens and refill at max_requests per window_seconds.
+_rate_limit_store: Dict[str, Tuple[float, float]] = {}
+# Guards _rate_limit_store and the sweep state below; webhook handlers run
+# on multiple threads.
+_rate_limit_lock = threading.Lock()
+
+# Buckets untouched for longer than the longest window seen are full again,
+# which is the same as having no entry; they are dropped every _GC_INTERVAL.
+_GC_INTERVAL = 300.0
+_last_gc = 0.0
+_longest_window = 0.0
 
 # Rate limit configuration
 RATE_LIMIT_WINDOW = 60  # 1 minute window
@@ -26,8 +37,8 @@ def check_rate_limit(key: str, max_requests: int = RATE_LIMIT_MAX_REQUESTS, wind
     
     Args:
         key: Rate limit key (e.g., "pr:owner/repo:123")
-        max_requests: Maximum requests allowed in window
-        window_seconds: Time window in seconds
+        max_requests: Maximum requests allowed in window (the burst size)
+        window_seconds: Time window in seconds (an empty bucket refills fully in this time)
     
     Returns:
         Tuple of (is_allowed, remaining_requests)
@@ -45,24 +56,40 @@ def check_rate_limit(key: str, max_requests: int = RATE_LIMIT_MAX_REQUESTS, wind
             # Fall back to in-memory rate limiting on Redis errors
             pass
 
-    now = time.time()
-    cutoff = now - window_seconds
-    
-    # Get requests in current window
-    requests = _rate_limit_store[key]
-    
-    # Remove old requests outside window
-    requests[:] = [req_time for req_time in requests if req_time > cutoff]
-    
-    # Check if limit exceeded
-    if len(requests) >= max_requests:
-        return False, 0
-    
-    # Add current request
-    requests.append(now)
-    
-    remaining = max_requests - len(requests)
-    return True, remaining
+    with _rate_limit_lock:
+        now = time.monotonic()
+        _sweep_idle_buckets(now, window_seconds)
+
+        # Refill for the time since the last request, up to a full bucket
+        tokens, last = _rate_limit_store.get(key, (float(max_requests), now))
+        tokens = min(float(max_requests), tokens + (now - last) * max_requests / window_seconds)
+
+        # Check if limit exceeded
+        if tokens < 1:
+            _rate_limit_store[key] = (tokens, now)
+            return False, 0
+
+        # Spend a token on the current request
+        tokens -= 1
+        _rate_limit_store[key] = (tokens, now)
+        return True, int(tokens)
+
+
+def _sweep_idle_buckets(now: float, window_seconds: float) -> None:
+    """
+    Drop in-memory buckets that have fully refilled (at most every _GC_INTERVAL).
+
+    Caller must hold _rate_limit_lock.
+    """
+    global _last_gc, _longest_window
+    if window_seconds > _longest_window:
+        _longest_window = window_seconds
+    if now - _last_gc < _GC_INTERVAL:
+        return
+    _last_gc = now
+    cutoff = now - _longest_window
+    for key in [k for k, (_, last) in list(_rate_limit_store.items()) if last <= cutoff]:
+        del _rate_limit_store[key]
 
 
 def get_rate_limit_key(owner: str, repo: str, pr_number: int) -> str:
@@ -78,8 +105,8 @@ def reset_rate_limit(key: str):
             redis_client.delete(f"railo:rate:{key}")
         except Exception:
             pass
-    if key in _rate_limit_store:
-        del _rate_limit_store[key]
+    with _rate_limit_lock:
+        _rate_limit_store.pop(key, None)
 
 
 # ---------------------------------------------------------------------------
@@ -5,7 +5,7 @@ Handles idempotency, loop prevention, and confidence gating.
 from __future__ import annotations
 
 import hashlib
-import json
+import re
 from pathlib import Path
 from typing import Iterable, Tuple, List
 
@@ -18,6 +18,9 @@ def compute_fix_idempotency_key(
     """
     Compute idempotency key for a fix to prevent re-applying same fix.
     
+    The key is only a dedup token, not a security boundary, so it uses a
+    128-bit BLAKE2b digest (32 hex characters).
+    
     Args:
         pr_number: PR number
         head_sha: Current HEAD commit SHA
@@ -26,21 +29,14 @@ def compute_fix_idempotency_key(
     Returns:
         Unique idempotency key
     """
-    # Combine PR number, commit SHA, file path, and line number
+    # Combine PR number, commit SHA, file path, line number and rule,
+    # NUL-separated (none of them can contain a NUL byte)
     file_path = finding.get("path", "")
     start_line = finding.get("start", {}).get("line", 0)
     check_id = finding.get("check_id", "")
     
-    key_data = {
-        "pr": pr_number,
-        "sha": head_sha,
-        "file": file_path,
-        "line": start_line,
-        "check": check_id,
-    }
-    
-    key_str = json.dumps(key_data, sort_keys=True)
-    return hashlib.sha256(key_str.encode()).hexdigest()
+    key_str = f"{pr_number}\0{head_sha}\0{file_path}\0{start_line}\0{check_id}"
+    return hashlib.blake2b(key_str.encode(), digest_size=16, usedforsecurity=False).hexdigest()
 
 
 def is_bot_commit(commit_message: str, commit_author: str) -> bool:
@@ -405,6 +401,13 @@ def validate_patch_plan(plan, config: dict) -> Tuple[bool, List[str]]:
     return (len(reasons) == 0, reasons)
 
 
+# Import, function and class lines in a unified diff; the named group
+# that matched tells which
+_DECLARATION_RE = re.compile(
+    r'^[\+\-]\s*(?:(?P<import>import|from)\s+|(?P<def>def)\s+\w+|(?P<class>class)\s+\w+)'
+)
+
+
 def analyze_diff_quality(repo_path: Path) -> dict:
     """
     Analyze git diff quality to ensure minimal, focused security patches.
@@ -414,6 +417,9 @@ def analyze_diff_quality(repo_path: Path) -> dict:
     - Reordering (imports, functions, classes)
     - Unrelated whitespace changes
     
+    The diff is read line by line from git (without context lines, which
+    none of the checks look at) and scanned in a single pass.
+    
     Args:
         repo_path: Path to repository root
     
@@ -424,39 +430,12 @@ def analyze_diff_quality(repo_path: Path) -> dict:
         - is_minimal: bool - True if diff is minimal and focused
     """
     import subprocess
-    import re
     
     issues: List[str] = []
     score = 1.0
     
     try:
-        # Get unified diff output
-        result = subprocess.run(
-            ["git", "diff", "--no-color"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            check=False,
-        )
-        
-        if not result.stdout.strip():
-            # No diff - perfect quality
-            return {
-                "quality_score": 1.0,
-                "issues": [],
-                "is_minimal": True,
-            }
-        
-        diff_lines = result.stdout.splitlines()
-        
-        # Track context to detect reordering
         in_hunk = False
-        hunk_context: List[str] = []
-        
-        # Patterns to detect problematic changes
-        import_pattern = re.compile(r'^[\+\-]\s*(import|from)\s+')
-        function_pattern = re.compile(r'^[\+\-]\s*def\s+\w+')
-        class_pattern = re.compile(r'^[\+\-]\s*class\s+\w+')
         
         # Track additions/removals that might indicate reordering
         added_imports: set[str] = set()
@@ -468,58 +447,72 @@ def analyze_diff_quality(repo_path: Path) -> dict:
         whitespace_only_changes = 0
         total_changes = 0
         
-        for i, line in enumerate(diff_lines):
-            if line.startswith("@@"):
-                # Hunk header - reset context
-                in_hunk = True
-                hunk_context = []
-                continue
-            
-            if not in_hunk:
-                continue
-            
-            if line.startswith("\\"):
-                continue
-            
-            # Track changes
-            if line.startswith("+") or line.startswith("-"):
-                total_changes += 1
+        # Large blocks of additions/removals suggest refactoring
+        consecutive_additions = 0
+        consecutive_removals = 0
+        max_consecutive = 0
+        
+        with subprocess.Popen(
+            ["git", "diff", "--no-color", "-U0"],
+            cwd=repo_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ) as proc:
+            assert proc.stdout is not None
+            for line in proc.stdout:
+                line = line.rstrip("\n")
+                
+                if line.startswith("+"):
+                    consecutive_additions += 1
+                    consecutive_removals = 0
+                    max_consecutive = max(max_consecutive, consecutive_additions)
+                elif line.startswith("-"):
+                    consecutive_removals += 1
+                    consecutive_additions = 0
+                    max_consecutive = max(max_consecutive, consecutive_removals)
+                else:
+                    consecutive_additions = 0
+                    consecutive_removals = 0
                 
-                # Check for pure whitespace changes
-                stripped = line[1:].strip()
-                if not stripped:
-                    whitespace_only_changes += 1
+                if line.startswith("@@"):
+                    # Hunk header
+                    in_hunk = True
                     continue
                 
-                # Detect import reordering
-                if import_pattern.match(line):
-                    import_stmt = stripped
-                    if line.startswith("+"):
-                        added_imports.add(import_stmt)
-                    else:
-                        removed_imports.add(import_stmt)
+                if not in_hunk:
+                    continue
                 
-                # Detect function/class reordering
-                if function_pattern.match(line):
-                    func_match = function_pattern.search(line)
-                    if func_match:
-                        func_name = func_match.group(0)
+                # Track changes
+                if line.startswith("+") or line.startswith("-"):
+                    total_changes += 1
+                    
+                    # Check for pure whitespace changes
+                    stripped = line[1:].strip()
+                    if not stripped:
+                        whitespace_only_changes += 1
+                        continue
+                    
+                    # Detect import, function and class reordering
+                    match = _DECLARATION_RE.match(line)
+                    if match is None:
+                        continue
+                    kind = match.lastgroup
+                    if kind == "import":
+                        if line.startswith("+"):
+                            added_imports.add(stripped)
+                        else:
+                            removed_imports.add(stripped)
+                    elif kind == "def":
+                        func_name = match.group(0)
                         if line.startswith("+"):
                             added_functions.add(func_name)
                         else:
                             removed_functions.add(func_name)
-                
-                if class_pattern.match(line):
-                    class_match = class_pattern.search(line)
-                    if class_match:
-                        class_name = class_match.group(0)
+                    else:
                         # Class reordering is suspicious
-                        issues.append(f"Class definition moved: {class_name}")
+                        issues.append(f"Class definition moved: {match.group(0)}")
                         score -= 0.1
-            
-            # Track context lines (unchanged)
-            elif line.startswith(" "):
-                hunk_context.append(line[1:])
         
         # Check for import reordering (same imports added and removed)
         reordered_imports = added_imports & removed_imports
@@ -549,25 +542,6 @@ def analyze_diff_quality(repo_path: Path) -> dict:
                 )
                 score -= 0.2
         
-        # Check for suspicious patterns that suggest refactoring
-        # Look for large blocks of additions/removals that aren't security fixes
-        consecutive_additions = 0
-        consecutive_removals = 0
-        max_consecutive = 0
-        
-        for line in diff_lines:
-            if line.startswith("+"):
-                consecutive_additions += 1
-                consecutive_removals = 0
-                max_consecutive = max(max_consecutive, consecutive_additions)
-            elif line.startswith("-"):
-                consecutive_removals += 1
-                consecutive_additions = 0
-                max_consecutive = max(max_consecutive, consecutive_removals)
-            else:
-                consecutive_additions = 0
-                consecutive_removals = 0
-        
         # Large consecutive blocks might indicate refactoring
         if max_consecutive > 20:
             issues.append(
@@ -4,12 +4,15 @@ Opens a fix PR (or returns the existing open PR for the same head branch).
 """
 from __future__ import annotations
 
+import logging
 import os
 from github import Github, Auth  # type: ignore[import-not-found]
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 def open_or_get_pr(
     owner: str,
@@ -116,7 +119,7 @@ def update_pr_body(
         return True
         
     except Exception as e:
-        print(f"Warning: Failed to update PR body: {e}")
+        logger.warning("Failed to update PR body: %s", e)
         return False
 
 
@@ -133,7 +136,7 @@ def comment_on_pr(owner: str, repo: str, pr_number: int, body: str) -> bool:
         pr.create_issue_comment(body)
         return True
     except Exception as e:  # pragma: no cover - defensive
-        print(f"Warning: Failed to comment on PR: {e}")
+        logger.warning("Failed to comment on PR: %s", e)
         return False
 
 
@@ -152,7 +155,7 @@ def add_pr_labels(owner: str, repo: str, pr_number: int, labels: list[str]) -> b
         issue.add_to_labels(*labels)
         return True
     except Exception as e:  # pragma: no cover - defensive
-        print(f"Warning: Failed to add labels: {e}")
+        logger.warning("Failed to add labels: %s", e)
         return False
 
 
@@ -170,5 +173,5 @@ def request_review_from_users(owner: str, repo: str, pr_number: int, usernames:
         pr.create_review_request(reviewers=usernames)
         return True
     except Exception as e:  # pragma: no cover - defensive
-        print(f"Warning: Failed to request reviewers: {e}")
+        logger.warning("Failed to request reviewers: %s", e)
         return False
@@ -1,7 +1,9 @@
 """
 Tests for core/fixer.py - the fixing engine.
 """
-from core.fixer import process_findings
+from pathlib import Path
+
+from core.fixer import _match_rule_key_dict, _match_rule_key_list, process_findings
 
 
 class TestProcessFindings:
@@ -147,3 +149,113 @@ def get_user(email):
         assert processed[0]["fixed"] is True
         # Second should not be fixed (other rule)
         assert processed[1]["fixed"] is False
+
+
+class TestRuleKeyMatching:
+    """Tests for mapping check_ids onto configured rule keys."""
+
+    def test_enabled_list_matches_alias(self):
+        """Friendly keys should match via their aliases."""
+        assert _match_rule_key_list("custom.hardcoded-password", ["sqli", "secrets"]) == "secrets"
+        assert _match_rule_key_list("custom.sql-injection-fstring", ["sqli", "secrets"]) == "sqli"
+
+    def test_longest_match_wins(self):
+        """The most specific configured key should win."""
+        enforce = {"xss": "warn", "dom-xss": "enforce"}
+        assert _match_rule_key_dict("javascript-dom-xss-innerhtml", enforce) == "dom-xss"
+
+    def test_empty_candidates_return_none(self):
+        """Empty configs should short-circuit to no match."""
+        assert _match_rule_key_dict("sql-injection", {}) is None
+        assert _match_rule_key_list("sql-injection", []) is None
+        assert _match_rule_key_list("other-rule", ["sqli"]) is None
+
+    def test_direct_key_scores_its_own_length(self):
+        """A key found directly is not credited with a longer alias elsewhere in the id."""
+        assert _match_rule_key_list("secrets.github-token.insecure-x", ["secrets", "insecure-x"]) == "insecure-x"
+        assert _match_rule_key_list("js.sqli.sql-injection.dangerous", ["sqli", "dangerous"]) == "dangerous"
+
+    def test_alias_does_not_hide_direct_key_at_same_position(self):
+        assert _match_rule_key_list("js.javascript-eval.eval", ["eval", "javascript"]) == "javascript"
+
+
+class TestDirectoryPolicy:
+    """Tests for per-directory policy resolution."""
+
+    def test_longest_prefix_wins(self):
+        """The most specific directory policy should apply."""
+        from core.fixer import _get_directory_policy
+
+        config = {
+            "directory_policies": {
+                "src/": {"severity_threshold": "ERROR"},
+                "src/auth/": {"severity_threshold": "WARNING"},
+            }
+        }
+        assert _get_directory_policy(config, "src/auth/login.py") == {"severity_threshold": "WARNING"}
+        assert _get_directory_policy(config, "src/auth/nested/x.py") == {"severity_threshold": "WARNING"}
+        assert _get_directory_policy(config, "src/app.py") == {"severity_threshold": "ERROR"}
+        assert _get_directory_policy(config, "app.py") is None
+
+
+class TestFormattingGuardrail:
+    """Tests for reverting formatting that bloats the patch diff."""
+
+    _VULNERABLE = '''import sqlite3
+
+def get_user(email):
+    conn = sqlite3.connect("users.db")
+    cursor = conn.cursor()
+    query = f"SELECT * FROM users WHERE email = '{email}'"
+    cursor.execute(query)
+    return cursor.fetchone()
+'''
+
+    def _init_repo(self, repo):
+        import subprocess
+
+        for name in ("app.py", "other.py"):
+            (repo / name).write_text(self._VULNERABLE)
+        subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+        subprocess.run(["git", "add", "."], cwd=repo, check=True)
+        subprocess.run(
+            ["git", "-c", "user.email=t@example.com", "-c", "user.name=t", "commit", "-qm", "init"],
+            cwd=repo,
+            check=True,
+        )
+
+    def _findings(self, repo):
+        return [
+            {
+                "check_id": "custom.sql-injection-fstring",
+                "path": str(repo / name),
+                "start": {"line": 6, "col": 5},
+                "end": {"line": 6, "col": 60},
+                "extra": {"message": "SQL injection vulnerability", "severity": "ERROR"},
+            }
+            for name in ("app.py", "other.py")
+        ]
+
+    def test_expanding_format_reverted_per_file(self, temp_repo, monkeypatch):
+        """Only the file whose diff grew past the limit should be reverted."""
+        import core.fixer as fixer
+
+        self._init_repo(temp_repo)
+
+        def _fake_format_files(repo_path, files, language=None):
+            target = repo_path / "app.py"
+            target.write_text(target.read_text() + "\n".join(f"# pad {i}" for i in range(20)) + "\n")
+            return {Path(f): (True, 0, 0) for f in files}
+
+        monkeypatch.setattr(fixer, "format_files", _fake_format_files)
+        rules_path = temp_repo / "rules.yaml"
+        rules_path.write_text("rules: []")
+
+        any_changes, _ = process_findings(
+            temp_repo, self._findings(temp_repo), rules_path, config={"format_after_patch": True}
+        )
+
+        assert any_changes is True
+        assert "# pad" not in (temp_repo / "app.py").read_text()
+        assert 'f"SELECT' not in (temp_repo / "app.py").read_text()
+        assert 'f"SELECT' not in (temp_repo / "other.py").read_text()
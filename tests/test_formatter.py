@@ -0,0 +1,305 @@
+"""
+Tests for core/formatter.py - best-effort post-patch formatting.
+
+External formatters are replaced with fakes so these tests do not depend
+on ruff/black/prettier being installed.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+import core.formatter as formatter
+from core.formatter import format_file, format_files
+
+
+def _fake_formatter(calls: list[list[str]], fail_on: str | None = None):
+    """Return a runner that upper-cases 'x' and records each invocation."""
+
+    def _run(repo_path: Path, files) -> bool:
+        calls.append([Path(f).name for f in files])
+        if fail_on and any(Path(f).name == fail_on for f in files):
+            return False
+        for f in files:
+            text = Path(f).read_text(encoding="utf-8")
+            Path(f).write_text(text.replace("x=1", "x = 1"), encoding="utf-8")
+        return True
+
+    return _run
+
+
+class TestFormatFiles:
+    """Tests for batched formatting."""
+
+    def test_one_invocation_per_formatter(self, temp_repo, monkeypatch):
+        """All Python files should be formatted by a single formatter call."""
+        calls: list[list[str]] = []
+        monkeypatch.setitem(formatter._FORMATTERS, "python", _fake_formatter(calls))
+        for name in ("a.py", "b.py", "c.py"):
+            (temp_repo / name).write_text("x=1\n", encoding="utf-8")
+
+        results = format_files(temp_repo, ["a.py", "b.py", "c.py"])
+
+        assert calls == [["a.py", "b.py", "c.py"]]
+        assert results[Path("a.py")] == (True, 1, 1)
+        assert all(ok for ok, _, _ in results.values())
+
+    def test_failed_batch_retries_per_file(self, temp_repo, monkeypatch):
+        """A single bad file should not prevent the others being formatted."""
+        calls: list[list[str]] = []
+        monkeypatch.setitem(formatter._FORMATTERS, "python", _fake_formatter(calls, fail_on="bad.py"))
+        (temp_repo / "good.py").write_text("x=1\n", encoding="utf-8")
+        (temp_repo / "bad.py").write_text("x=1\n", encoding="utf-8")
+
+        results = format_files(temp_repo, ["good.py", "bad.py"])
+
+        assert results[Path("good.py")][0] is True
+        assert results[Path("bad.py")] == (False, 0, 0)
+
+    def test_unknown_and_missing_files_skipped(self, temp_repo):
+        """Unsupported or missing files should report failure without raising."""
+        (temp_repo / "notes.txt").write_text("hello\n", encoding="utf-8")
+
+        results = format_files(temp_repo, ["notes.txt", "missing.py"])
+
+        assert results == {
+            Path("notes.txt"): (False, 0, 0),
+            Path("missing.py"): (False, 0, 0),
+        }
+
+    def test_format_file_delegates(self, temp_repo, monkeypatch):
+        """The single-file wrapper should return the batched result."""
+        calls: list[list[str]] = []
+        monkeypatch.setitem(formatter._FORMATTERS, "python", _fake_formatter(calls))
+        target = temp_repo / "app.py"
+        target.write_text("x=1\n", encoding="utf-8")
+
+        assert format_file(temp_repo, target) == (True, 1, 1)
+        assert target.read_text(encoding="utf-8") == "x = 1\n"
+
+
+class _FakeBlack:
+    """Minimal stand-in for black's command-line entry point."""
+
+    @staticmethod
+    def main(args, standalone_mode=True):
+        assert standalone_mode is False
+        for f in args:
+            if f.startswith("-"):
+                continue
+            text = Path(f).read_text(encoding="utf-8")
+            if "x = 1" not in text:
+                Path(f).write_text(text.replace("x=1", "x = 1"), encoding="utf-8")
+        return 0
+
+
+class TestInProcessBlack:
+    """Tests for the in-process black fallback."""
+
+    def test_used_when_ruff_unavailable(self, temp_repo, monkeypatch):
+        """black's library API should be used instead of its CLI."""
+        monkeypatch.setattr(formatter, "_run_ruff_format", lambda repo, files: False)
+        monkeypatch.setattr(formatter, "_black_lib", _FakeBlack)
+
+        def _no_subprocess(repo, files):
+            raise AssertionError("black CLI should not be invoked")
+
+        monkeypatch.setattr(formatter, "_run_black", _no_subprocess)
+        (temp_repo / "a.py").write_text("x=1\n", encoding="utf-8")
+        (temp_repo / "b.py").write_text("x = 1\n", encoding="utf-8")
+
+        results = format_files(temp_repo, ["a.py", "b.py"])
+
+        assert results[Path("a.py")] == (True, 1, 1)
+        assert results[Path("b.py")] == (True, 0, 0)
+        assert (temp_repo / "a.py").read_text(encoding="utf-8") == "x = 1\n"
+
+    def test_matches_cli_line_endings_and_config(self, temp_repo, monkeypatch):
+        """CRLF files keep their line endings and [tool.black] force-exclude applies."""
+        black = pytest.importorskip("black")
+        monkeypatch.setattr(formatter, "_black_lib", black)
+        (temp_repo / "pyproject.toml").write_text(
+            '[tool.black]\ntarget-version = ["py311"]\nforce-exclude = "gen\\\\.py"\n', encoding="utf-8"
+        )
+        (temp_repo / "a.py").write_bytes(b"x=1\r\n")
+        (temp_repo / "gen.py").write_bytes(b"x=1\n")
+
+        assert formatter._run_black_inproc(temp_repo, [temp_repo / "a.py", temp_repo / "gen.py"]) is True
+        assert (temp_repo / "a.py").read_bytes() == b"x = 1\r\n"
+        assert (temp_repo / "gen.py").read_bytes() == b"x=1\n"
+
+    def test_parse_error_reports_failure(self, temp_repo, monkeypatch):
+        black = pytest.importorskip("black")
+        monkeypatch.setattr(formatter, "_black_lib", black)
+        (temp_repo / "bad.py").write_text("def (:\n", encoding="utf-8")
+
+        assert formatter._run_black_inproc(temp_repo, [temp_repo / "bad.py"]) is False
+
+
+    def test_worker_thread_batch_uses_cli(self, temp_repo, monkeypatch):
+        """Mixed py+js batches run in a pool; black must not run in-process there."""
+        black = pytest.importorskip("black")
+        monkeypatch.setattr(formatter, "_black_lib", black)
+        monkeypatch.setattr(formatter, "_run_ruff_format", lambda repo, files: False)
+        monkeypatch.setattr(formatter, "_run_prettier_bin", lambda repo, files: False)
+        monkeypatch.setattr(formatter, "_run_prettier", lambda repo, files: False)
+
+        def _no_inproc(repo, files):
+            raise AssertionError("black should not run in-process off the main thread")
+
+        cli_calls = []
+        run_black = formatter._run_black
+
+        def _count_cli(repo, files):
+            cli_calls.append(list(files))
+            return run_black(repo, files)
+
+        monkeypatch.setattr(formatter, "_run_black_inproc", _no_inproc)
+        monkeypatch.setattr(formatter, "_run_black", _count_cli)
+        (temp_repo / "a.py").write_text("x=1\n", encoding="utf-8")
+        (temp_repo / "b.py").write_text("y=2\n", encoding="utf-8")
+        (temp_repo / "c.js").write_text("let x=1\n", encoding="utf-8")
+
+        results = format_files(temp_repo, ["a.py", "b.py", "c.js"])
+
+        assert results[Path("a.py")] == (True, 1, 1)
+        assert results[Path("b.py")] == (True, 1, 1)
+        assert len(cli_calls) == 1
+
+
+class TestToolResolution:
+    """Tests for cached formatter discovery."""
+
+    def test_missing_tool_skips_subprocess(self, temp_repo, monkeypatch):
+        """A formatter that is not on PATH should never be spawned."""
+        formatter._resolve_tool.cache_clear()
+        monkeypatch.setattr(formatter.shutil, "which", lambda tool: None)
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("subprocess should not be spawned")
+
+        monkeypatch.setattr(formatter.subprocess, "run", _fail)
+        try:
+            assert formatter._run_ruff_format(temp_repo, [temp_repo / "a.py"]) is False
+            assert formatter._run_prettier(temp_repo, [temp_repo / "a.js"]) is False
+        finally:
+            formatter._resolve_tool.cache_clear()
+
+
+class TestFormatCache:
+    """Tests for skipping content that is already known to be formatted."""
+
+    def test_unchanged_content_skips_formatter(self, temp_repo, monkeypatch):
+        """A second run over formatted content should not invoke the formatter."""
+        calls: list[list[str]] = []
+        runner = _fake_formatter(calls)
+        monkeypatch.setitem(formatter._FORMATTERS, "python", runner)
+        monkeypatch.setitem(formatter._FORMATTER_IDS, runner, lambda: "fake:1")
+        (temp_repo / "a.py").write_text("x=1\n", encoding="utf-8")
+
+        assert format_files(temp_repo, ["a.py"])[Path("a.py")] == (True, 1, 1)
+        assert format_files(temp_repo, ["a.py"])[Path("a.py")] == (True, 0, 0)
+        assert calls == [["a.py"]]
+
+    def test_formatter_change_invalidates(self, temp_repo, monkeypatch):
+        """Entries recorded for another formatter version must not be reused."""
+        calls: list[list[str]] = []
+        runner = _fake_formatter(calls)
+        monkeypatch.setitem(formatter._FORMATTERS, "python", runner)
+        monkeypatch.setitem(formatter._FORMATTER_IDS, runner, lambda: "fake:1")
+        (temp_repo / "a.py").write_text("x = 1\n", encoding="utf-8")
+        format_files(temp_repo, ["a.py"])
+
+        monkeypatch.setitem(formatter._FORMATTER_IDS, runner, lambda: "fake:2")
+        format_files(temp_repo, ["a.py"])
+
+        assert len(calls) == 2
+
+    def test_cache_dir_is_git_ignored(self, temp_repo, monkeypatch):
+        """The cache must not be staged by `git add .` in fix commits."""
+        runner = _fake_formatter([])
+        monkeypatch.setitem(formatter._FORMATTERS, "python", runner)
+        monkeypatch.setitem(formatter._FORMATTER_IDS, runner, lambda: "fake:1")
+        (temp_repo / "a.py").write_text("x=1\n", encoding="utf-8")
+
+        format_files(temp_repo, ["a.py"])
+
+        cache_dir = (temp_repo / formatter.FORMAT_CACHE_FILE).parent
+        assert (cache_dir / ".gitignore").read_text(encoding="utf-8") == "*\n"
+
+
+class TestDiffStats:
+    """Tests for line-level change counting."""
+
+    def test_identical_text(self):
+        assert formatter._diff_stats("a\nb\n", "a\nb\n") == (0, 0)
+
+    def test_change_in_middle(self):
+        before = "a\nb\nc\nd\n"
+        after = "a\nB\nc\nd\n"
+        assert formatter._diff_stats(before, after) == (1, 1)
+
+    def test_pure_insertion_and_deletion(self):
+        assert formatter._diff_stats("a\nc\n", "a\nb\nc\n") == (1, 0)
+        assert formatter._diff_stats("a\nb\nc\n", "a\nc\n") == (0, 1)
+        assert formatter._diff_stats("", "a\nb\n") == (2, 0)
+
+
+class TestConcurrentBatches:
+    """Tests for running different formatters side by side."""
+
+    def test_python_and_js_batches_both_run(self, temp_repo, monkeypatch):
+        calls: list[list[str]] = []
+        monkeypatch.setitem(formatter._FORMATTERS, "python", _fake_formatter(calls))
+        monkeypatch.setitem(formatter._FORMATTERS, "javascript", _fake_formatter(calls))
+        (temp_repo / "a.py").write_text("x=1\n", encoding="utf-8")
+        (temp_repo / "b.js").write_text("x=1\n", encoding="utf-8")
+
+        results = format_files(temp_repo, ["a.py", "b.js"])
+
+        assert sorted(calls) == [["a.py"], ["b.js"]]
+        assert results == {Path("a.py"): (True, 1, 1), Path("b.js"): (True, 1, 1)}
+
+
+class TestIdenticalRewrite:
+    """Tests for formatters that rewrite a file without changing it."""
+
+    def test_mtime_restored(self, temp_repo, monkeypatch):
+        import os
+
+        def _rewrite(repo_path, files):
+            for f in files:
+                data = Path(f).read_bytes()
+                Path(f).write_bytes(data)
+                os.utime(f, ns=(1, 1_000_000_000))
+            return True
+
+        monkeypatch.setitem(formatter._FORMATTERS, "python", _rewrite)
+        target = temp_repo / "a.py"
+        target.write_text("x = 1\n", encoding="utf-8")
+        os.utime(target, ns=(1, 500_000_000))
+
+        assert format_files(temp_repo, ["a.py"])[Path("a.py")] == (True, 0, 0)
+        assert target.stat().st_mtime_ns == 500_000_000
+
+    def test_same_size_same_mtime_rewrite_detected(self, temp_repo, monkeypatch):
+        """A same-size rewrite that keeps the mtime must not be reported (or cached) as untouched."""
+        import os
+
+        def _swap_quotes(repo_path, files):
+            for f in files:
+                st = Path(f).stat()
+                Path(f).write_text(Path(f).read_text(encoding="utf-8").replace("'", '"'), encoding="utf-8")
+                os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns))
+            return True
+
+        monkeypatch.setitem(formatter._FORMATTERS, "python", _swap_quotes)
+        monkeypatch.setitem(formatter._FORMATTER_IDS, _swap_quotes, lambda: "fake:1")
+        target = temp_repo / "a.py"
+        target.write_text("x = 'a'\n", encoding="utf-8")
+
+        assert format_files(temp_repo, ["a.py"])[Path("a.py")] == (True, 1, 1)
+        cache = formatter.FormatCache(temp_repo)
+        assert not cache.is_formatted("x = 'a'\n", f"fake:1:{formatter._config_fingerprint(temp_repo)}")
+        assert cache.is_formatted('x = "a"\n', f"fake:1:{formatter._config_fingerprint(temp_repo)}")
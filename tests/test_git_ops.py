@@ -0,0 +1,76 @@
+"""
+Tests for core/git_ops.py helpers that don't need a remote.
+"""
+from __future__ import annotations
+
+import subprocess
+import sys
+
+from core.git_ops import _has_staged_changes, _test_relevant, run_tests
+
+
+def _py(code: str) -> str:
+    return f'"{sys.executable}" -c "{code}"'
+
+
+class TestRunTests:
+    """Tests for the pre-commit test runner."""
+
+    def test_success_returns_output(self, temp_repo):
+        ok, output = run_tests(temp_repo, _py("print('all good')"))
+        assert ok is True
+        assert "all good" in output
+
+    def test_failure_includes_stderr(self, temp_repo):
+        ok, output = run_tests(temp_repo, _py("import sys; sys.stderr.write('boom'); sys.exit(3)"))
+        assert ok is False
+        assert "boom" in output
+
+    def test_failure_without_output_reports_exit_code(self, temp_repo):
+        ok, output = run_tests(temp_repo, _py("import sys; sys.exit(2)"))
+        assert (ok, output) == (False, "Exit code 2")
+
+    def test_timeout(self, temp_repo):
+        ok, output = run_tests(temp_repo, _py("import time; time.sleep(10)"), timeout=1)
+        assert ok is False
+        assert "timed out" in output
+
+    def test_missing_command(self, temp_repo):
+        ok, output = run_tests(temp_repo, "definitely-not-a-real-command-xyz")
+        assert ok is False
+        assert "Command not found" in output
+
+
+class TestHasStagedChanges:
+    """Tests for staged-change detection."""
+
+    def test_detects_staged_files(self, temp_repo):
+        subprocess.run(["git", "init", "-q"], cwd=temp_repo, check=True)
+        assert _has_staged_changes(temp_repo) is False
+
+        (temp_repo / "a.txt").write_text("a\n", encoding="utf-8")
+        subprocess.run(["git", "add", "."], cwd=temp_repo, check=True)
+        assert _has_staged_changes(temp_repo) is True
+
+
+class TestTestRelevant:
+    """Tests for skipping test runs on documentation-only commits."""
+
+    def test_docs_only_not_relevant(self):
+        assert _test_relevant(["README.md", "docs/guide/setup.html", "LICENSE", "CHANGES.rst"]) is False
+
+    def test_code_change_relevant(self):
+        assert _test_relevant(["README.md", "core/fixer.py"]) is True
+
+    def test_requirements_relevant(self):
+        assert _test_relevant(["requirements.txt"]) is True
+        assert _test_relevant(["requirements-dev.txt"]) is True
+        assert _test_relevant(["requirements/dev.txt"]) is True
+
+    def test_other_txt_files_relevant(self):
+        assert _test_relevant(["CMakeLists.txt"]) is True
+        assert _test_relevant(["constraints.txt"]) is True
+        assert _test_relevant(["README.txt", "CHANGELOG.txt", "LICENSE.txt"]) is False
+
+    def test_unknown_change_set_relevant(self):
+        assert _test_relevant([]) is True
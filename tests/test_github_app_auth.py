@@ -0,0 +1,84 @@
+"""Tests for GitHub App JWT / installation-token caching in core/github_app_auth.py.
+
+Fully offline: PyJWT signing and the token-exchange HTTP call are mocked.
+"""
+from __future__ import annotations
+
+import io
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import core.github_app_auth as auth
+
+
+@pytest.fixture(autouse=True)
+def _app_env(monkeypatch):
+    monkeypatch.setenv("GITHUB_APP_ID", "12345")
+    monkeypatch.setenv("GITHUB_APP_PRIVATE_KEY", "-----BEGIN FAKE KEY-----")
+    jwt_module = MagicMock()
+    jwt_module.encode.side_effect = lambda payload, key, algorithm: f"jwt-{payload['iat']}"
+    monkeypatch.setattr(auth, "_JWT_MODULE", jwt_module)
+    auth._jwt_cache.clear()
+    auth._inst_token_cache.clear()
+    yield jwt_module
+    auth._jwt_cache.clear()
+    auth._inst_token_cache.clear()
+
+
+def _token_response(token: str, expires_in: int = 3600):
+    expires_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + expires_in))
+    resp = MagicMock()
+    resp.json.return_value = {"token": token, "expires_at": expires_at}
+    return resp
+
+
+def _session(**kwargs):
+    session = MagicMock()
+    session.post = MagicMock(**kwargs)
+    return patch.object(auth, "_get_http_session", return_value=session)
+
+
+class TestInstallationTokenCache:
+    def test_token_reused_until_expiry(self, _app_env):
+        with _session(return_value=_token_response("tok-1")) as get_session:
+            assert auth.get_installation_access_token(1) == "tok-1"
+            assert auth.get_installation_access_token(1) == "tok-1"
+        assert get_session.return_value.post.call_count == 1
+        assert _app_env.encode.call_count == 1
+
+    def test_tokens_are_per_installation_but_share_jwt(self, _app_env):
+        with _session(side_effect=[_token_response("tok-1"), _token_response("tok-2")]) as get_session:
+            assert auth.get_installation_access_token(1) == "tok-1"
+            assert auth.get_installation_access_token(2) == "tok-2"
+        assert get_session.return_value.post.call_count == 2
+        assert _app_env.encode.call_count == 1
+
+    def test_nearly_expired_token_is_refreshed(self, _app_env):
+        with _session(side_effect=[_token_response("old", expires_in=30), _token_response("new")]):
+            assert auth.get_installation_access_token(1) == "old"
+            assert auth.get_installation_access_token(1) == "new"
+
+    def test_failed_exchange_is_not_cached(self, _app_env):
+        with _session(side_effect=OSError("network down")):
+            assert auth.get_installation_access_token(1) is None
+        assert auth._inst_token_cache == {}
+
+
+class TestHttpSession:
+    def test_session_is_shared(self, monkeypatch):
+        monkeypatch.setattr(auth, "_http_session", None)
+        first = auth._get_http_session()
+        assert first is not None
+        assert auth._get_http_session() is first
+
+    def test_urllib_fallback_without_requests(self, _app_env):
+        body = json.dumps({"token": "tok-u", "expires_at": "2999-01-01T00:00:00Z"}).encode()
+        resp = MagicMock()
+        resp.__enter__.return_value = io.BytesIO(body)
+        with patch.object(auth, "_get_http_session", return_value=None), patch(
+            "urllib.request.urlopen", return_value=resp
+        ):
+            assert auth.get_installation_access_token(7) == "tok-u"
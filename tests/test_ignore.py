@@ -0,0 +1,94 @@
+"""
+Tests for core/ignore.py - .fixpointignore matching.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from core.ignore import CompiledIgnore, compile_patterns, filter_ignored_files, read_ignore_file, should_ignore_file
+
+
+@pytest.mark.parametrize(
+    "pattern, path, expected",
+    [
+        ("README.md", "README.md", True),
+        ("README.md", "docs/README.md", False),
+        ("vendor/", "vendor/lib.py", True),
+        ("vendor/", "vendor", True),
+        ("vendor/", "src/vendor/lib.py", False),
+        ("*.min.js", "static/js/app.min.js", True),
+        ("test_*.py", "tests/unit/test_app.py", True),
+        ("test_*.py", "tests/unit/app_test.py", False),
+        ("**/*.js", "a/b/c.js", True),
+        ("src/*.py", "src/app.py", True),
+        ("src/*.py", "lib/app.py", False),
+        ("src/legacy", "src/legacy/old.py", True),
+        ("src/legacy", "src/legacy_new/app.py", False),
+        ("src\\legacy\\", "src/legacy/old.py", True),
+    ],
+)
+def test_pattern_forms(pattern, path, expected):
+    assert should_ignore_file(path, [pattern], Path(".")) is expected
+
+
+def test_windows_style_paths_are_normalized():
+    assert should_ignore_file("vendor\\lib.py", ["vendor/"], Path(".")) is True
+
+
+def test_empty_patterns_ignore_nothing():
+    assert CompiledIgnore([]).matches("app.py") is False
+    assert should_ignore_file("app.py", [], Path(".")) is False
+
+
+def test_compile_patterns_is_cached():
+    assert compile_patterns(["*.md"]) is compile_patterns(["*.md"])
+    assert compile_patterns(["*.md"]).matches("docs/guide.md") is True
+
+
+def test_filter_preserves_order(temp_repo):
+    paths = ["b.py", "vendor/x.py", "a.py", "docs/guide.md"]
+    assert filter_ignored_files(paths, temp_repo, ["vendor/", "*.md"]) == ["b.py", "a.py"]
+
+
+def test_filter_reads_ignore_file(temp_repo):
+    (temp_repo / ".fixpointignore").write_text("# comment\n\nbuild/\n", encoding="utf-8")
+    assert filter_ignored_files(["build/out.py", "app.py"], temp_repo) == ["app.py"]
+
+
+def test_read_ignore_file_sees_edits(temp_repo):
+    ignore_file = temp_repo / ".fixpointignore"
+    assert read_ignore_file(temp_repo) == []
+    ignore_file.write_text("build/\n", encoding="utf-8")
+    assert read_ignore_file(temp_repo) == ["build/"]
+    ignore_file.write_text("build/\n*.log\n", encoding="utf-8")
+    assert read_ignore_file(temp_repo) == ["build/", "*.log"]
+
+
+class TestNegation:
+    """Tests for `!pattern` re-inclusion (last match wins)."""
+
+    def test_negation_reincludes(self):
+        patterns = ["*.py", "!keep_*.py"]
+        assert should_ignore_file("src/app.py", patterns, Path(".")) is True
+        assert should_ignore_file("src/keep_me.py", patterns, Path(".")) is False
+
+    def test_later_pattern_overrides_negation(self):
+        patterns = ["*.py", "!keep_*.py", "legacy/"]
+        assert should_ignore_file("legacy/keep_me.py", patterns, Path(".")) is True
+        assert should_ignore_file("src/keep_me.py", patterns, Path(".")) is False
+
+    def test_negation_inside_ignored_directory(self):
+        patterns = ["vendor/", "!vendor/patched.py"]
+        assert should_ignore_file("vendor/lib.py", patterns, Path(".")) is True
+        assert should_ignore_file("vendor/patched.py", patterns, Path(".")) is False
+
+    def test_leading_negation_is_noop(self):
+        assert CompiledIgnore(["!app.py"]).matches("app.py") is False
+        assert CompiledIgnore(["!"]).matches("app.py") is False
+
+    def test_filter_with_negation(self, temp_repo):
+        paths = ["a.py", "keep_a.py", "vendor\\keep_b.py", "README.md"]
+        patterns = ["*.py", "!keep_*.py", "vendor/"]
+        assert filter_ignored_files(paths, temp_repo, patterns) == ["keep_a.py", "README.md"]
@@ -0,0 +1,386 @@
+"""
+Tests for core/metrics.py - in-memory metrics, summaries and CSV export.
+"""
+from __future__ import annotations
+
+import csv
+import json
+
+import pytest
+
+from core.metrics import (
+    clear_metrics,
+    export_metrics_csv,
+    flush_metrics,
+    generate_metrics_summary,
+    record_metric,
+)
+
+
+@pytest.fixture(autouse=True)
+def _clean_metrics(monkeypatch):
+    monkeypatch.setenv("RAILO_AUDIT_LOG_DB", "0")
+    clear_metrics()
+    yield
+    clear_metrics()
+
+
+def _record_sample_events():
+    record_metric("pr_processed", "o/a", pr_number=1, violations_found=4, violations_fixed=2)
+    record_metric("fix_applied", "o/a", pr_number=1, violations_fixed=2, mode="enforce")
+    record_metric("pr_processed", "o/b", pr_number=2, violations_found=1, status="failure")
+    record_metric(
+        "run_completed",
+        "o/b",
+        metadata={
+            "runtime_seconds": 3.0,
+            "fixes_attempted": 2,
+            "fixes_applied": 1,
+            "degraded_reasons": ["timeout"],
+            "failure_reason": "tests_failed",
+        },
+    )
+    record_metric("run_completed", "o/a", metadata={"runtime_seconds": 1.0, "fixes_attempted": 1})
+
+
+class TestMetricsSummary:
+    """Tests for generate_metrics_summary."""
+
+    def test_empty_store(self):
+        assert generate_metrics_summary() == {}
+
+    def test_counts(self):
+        _record_sample_events()
+
+        summary = generate_metrics_summary()
+
+        assert summary["total_events"] == 5
+        assert summary["unique_repos"] == 2
+        assert summary["prs_processed"] == 2
+        assert summary["fixes_applied"] == 1
+        assert summary["total_violations_found"] == 5
+        assert summary["total_violations_fixed"] == 4
+        assert summary["fix_rate"] == pytest.approx(0.8)
+        assert summary["warn_mode_events"] == 4
+        assert summary["enforce_mode_events"] == 1
+        assert summary["success_rate"] == pytest.approx(0.8)
+        assert summary["failure_count"] == 1
+
+    def test_run_summary(self):
+        _record_sample_events()
+
+        summary = generate_metrics_summary()
+
+        assert summary["run_count"] == 2
+        assert summary["runtime_p50"] == pytest.approx(2.0)
+        assert summary["runtime_p95"] == pytest.approx(2.9)
+        assert summary["fixes_attempted"] == 3
+        assert summary["fixes_applied"] == 1
+        assert summary["degraded_to_warn_count"] == 1
+        assert summary["degraded_reasons"] == {"timeout": 1}
+        assert summary["failure_reasons"] == {"tests_failed": 1}
+
+    def test_running_totals_follow_new_events_and_clear(self):
+        record_metric("pr_processed", "o/a", violations_found=2)
+        assert generate_metrics_summary()["total_events"] == 1
+
+        record_metric("pr_processed", "o/b", violations_found=3)
+        summary = generate_metrics_summary()
+        assert summary["total_events"] == 2
+        assert summary["total_violations_found"] == 5
+
+        clear_metrics()
+        assert generate_metrics_summary() == {}
+
+    def test_summary_reasons_are_copies(self):
+        _record_sample_events()
+        generate_metrics_summary()["degraded_reasons"]["timeout"] = 99
+        assert generate_metrics_summary()["degraded_reasons"] == {"timeout": 1}
+
+
+class TestCsvExport:
+    """Tests for export_metrics_csv."""
+
+    def test_empty_store_writes_nothing(self, tmp_path):
+        out = tmp_path / "metrics.csv"
+        assert export_metrics_csv(out) is False
+        assert not out.exists()
+
+    def test_rows_and_metadata(self, tmp_path):
+        record_metric("pr_processed", "o/a", pr_number=7, violations_found=2, metadata={"note": "a,b"})
+        record_metric("fix_applied", "o/a")
+        out = tmp_path / "metrics.csv"
+
+        assert export_metrics_csv(out) is True
+
+        with open(out, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert [r["event_type"] for r in rows] == ["pr_processed", "fix_applied"]
+        assert rows[0]["pr_number"] == "7"
+        assert rows[0]["violations_found"] == "2"
+        assert json.loads(rows[0]["metadata"]) == {"note": "a,b"}
+        assert rows[1]["pr_number"] == ""
+        assert rows[1]["metadata"] == "{}"
+
+    def test_gzip_output(self, tmp_path):
+        import gzip
+
+        record_metric("pr_processed", "o/a", metadata={"note": "x"})
+        out = tmp_path / "metrics.csv.gz"
+
+        assert export_metrics_csv(out) is True
+
+        with gzip.open(out, "rt", newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert [r["repo"] for r in rows] == ["o/a"]
+        assert json.loads(rows[0]["metadata"]) == {"note": "x"}
+
+    def test_timestamp_formatted_as_iso(self, tmp_path):
+        from datetime import datetime, timezone
+
+        before = datetime.now(timezone.utc)
+        record_metric("pr_processed", "o/a")
+        out = tmp_path / "metrics.csv"
+        export_metrics_csv(out)
+
+        with open(out, newline="", encoding="utf-8") as f:
+            (row,) = list(csv.DictReader(f))
+        stamp = datetime.fromisoformat(row["timestamp"])
+        assert stamp.tzinfo is not None
+        assert abs((stamp - before).total_seconds()) < 60
+
+
+class TestInterning:
+    """Tests for sharing closed-set strings between stored events."""
+
+    def test_repeated_values_share_objects(self):
+        import sys
+
+        from core import metrics
+
+        for owner in ("o", "o"):
+            record_metric("".join(["pr_", "processed"]), f"{owner}/a", status="".join(["succ", "ess"]))
+
+        first, second = metrics._metrics_store
+        assert first["repo"] is second["repo"]
+        assert first["event_type"] is second["event_type"] is sys.intern("pr_processed")
+        assert first["status"] is second["status"]
+        assert generate_metrics_summary()["prs_processed"] == 2
+
+
+@pytest.fixture
+def metrics_db(tmp_path):
+    from core.db import init_db, set_db_path
+
+    set_db_path(tmp_path / "metrics.db")
+    init_db()
+    yield
+    set_db_path(None)
+
+
+def _run_rows():
+    from core.db import get_connection
+
+    conn = get_connection()
+    try:
+        return conn.execute("SELECT installation_id, repo, status FROM runs ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+class TestRunPersistence:
+    """Tests for queued, batched DB writes of run records."""
+
+    def test_runs_queued_until_read(self, metrics_db, monkeypatch):
+        from core import db
+
+        monkeypatch.setattr(db, "WRITE_FLUSH_INTERVAL", 60.0)
+        record_metric("pr_processed", "o/a", installation_id=1)
+        record_metric("pr_processed", "o/b", installation_id=1, status="failure")
+        record_metric("pr_processed", "o/c")  # no installation: memory only
+
+        assert db._run_writes.pending == 2
+        # Handing out a connection writes the queue first.
+        assert [tuple(r) for r in _run_rows()] == [(1, "o/a", "success"), (1, "o/b", "failure")]
+        assert db._run_writes.pending == 0
+
+    def test_full_batch_flushes_immediately(self, metrics_db, monkeypatch):
+        from core import db
+
+        monkeypatch.setattr(db, "WRITE_BATCH_SIZE", 2)
+        monkeypatch.setattr(db, "WRITE_FLUSH_INTERVAL", 60.0)
+        record_metric("pr_processed", "o/a", installation_id=1)
+        record_metric("pr_processed", "o/b", installation_id=1)
+
+        assert db._run_writes.pending == 0
+
+    def test_timer_flushes_in_background(self, metrics_db, monkeypatch):
+        import time
+
+        from core import db
+
+        monkeypatch.setattr(db, "WRITE_FLUSH_INTERVAL", 0.05)
+        record_metric("pr_processed", "o/a", installation_id=1)
+
+        deadline = time.monotonic() + 5
+        while db._run_writes.pending and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert db._run_writes.pending == 0
+        assert len(_run_rows()) == 1
+
+    def test_rows_written_to_db_active_when_queued(self, tmp_path, monkeypatch):
+        import sqlite3
+
+        from core import db
+
+        monkeypatch.setattr(db, "WRITE_FLUSH_INTERVAL", 60.0)
+        first, second = tmp_path / "first.db", tmp_path / "second.db"
+        db.set_db_path(None)
+        for path in (first, second):
+            monkeypatch.setenv("FIXPOINT_DB_PATH", str(path))
+            db.init_db()
+
+        monkeypatch.setenv("FIXPOINT_DB_PATH", str(first))
+        record_metric("pr_processed", "o/a", installation_id=1)
+        monkeypatch.setenv("FIXPOINT_DB_PATH", str(second))
+        flush_metrics()
+
+        def _repos(path):
+            with sqlite3.connect(path) as conn:
+                return [r[0] for r in conn.execute("SELECT repo FROM runs")]
+
+        assert _repos(first) == ["o/a"]
+        assert _repos(second) == []
+        db.set_db_path(None)
+
+    def test_flushes_reuse_one_connection_per_db(self, metrics_db, monkeypatch):
+        from core import db
+
+        monkeypatch.setattr(db, "WRITE_FLUSH_INTERVAL", 60.0)
+        record_metric("pr_processed", "o/a", installation_id=1)
+        flush_metrics()
+        conn = db._batch_conns[db.get_db_path()]
+        record_metric("pr_processed", "o/b", installation_id=1)
+        flush_metrics()
+
+        assert db._batch_conns == {db.get_db_path(): conn}
+        assert len(_run_rows()) == 2
+
+    def test_flush_metrics(self, metrics_db, monkeypatch):
+        from core import db
+
+        monkeypatch.setattr(db, "WRITE_FLUSH_INTERVAL", 60.0)
+        record_metric("pr_processed", "o/a", installation_id=1)
+        flush_metrics()
+
+        assert db._run_writes.pending == 0
+
+
+class TestBoundedStore:
+    """Tests for capping the in-memory store."""
+
+    def _bounded(self, monkeypatch, maxlen, spill_path=None):
+        from collections import deque
+
+        from core import metrics
+
+        monkeypatch.setattr(metrics, "_metrics_store", deque(maxlen=maxlen))
+        monkeypatch.setattr(metrics, "METRICS_SPILL_PATH", spill_path)
+        monkeypatch.setattr(metrics, "_SPILL_BATCH", 2)
+        return metrics
+
+    def test_oldest_events_evicted_totals_kept(self, monkeypatch):
+        metrics = self._bounded(monkeypatch, 2)
+        for repo in ("o/a", "o/b", "o/c"):
+            record_metric("pr_processed", repo)
+
+        assert [m["repo"] for m in metrics._metrics_store] == ["o/b", "o/c"]
+        assert generate_metrics_summary()["total_events"] == 3
+
+    def test_spilled_events_included_in_export(self, monkeypatch, tmp_path):
+        spill = tmp_path / "spill.csv"
+        self._bounded(monkeypatch, 2, spill)
+        for n in range(5):
+            record_metric("pr_processed", f"o/{n}")
+
+        out = tmp_path / "metrics.csv"
+        assert export_metrics_csv(out) is True
+
+        with open(out, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert [r["repo"] for r in rows] == ["o/0", "o/1", "o/2", "o/3", "o/4"]
+
+    def test_clear_metrics_removes_spilled_events(self, monkeypatch, tmp_path):
+        spill = tmp_path / "spill.csv"
+        self._bounded(monkeypatch, 2, spill)
+        for n in range(5):
+            record_metric("pr_processed", f"o/{n}")
+        assert spill.exists()
+
+        clear_metrics()
+        record_metric("pr_processed", "o/new")
+
+        out = tmp_path / "metrics.csv"
+        assert export_metrics_csv(out) is True
+        with open(out, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert [r["repo"] for r in rows] == ["o/new"]
+
+    def test_runtime_sample_bounded(self, monkeypatch):
+        metrics = self._bounded(monkeypatch, 2)
+        monkeypatch.setattr(metrics, "METRICS_MAX_EVENTS", 2)
+        monkeypatch.setattr(metrics, "_agg", metrics._new_aggregates())
+        for runtime in (100.0, 1.0, 3.0):
+            record_metric("run_completed", "o/a", metadata={"runtime_seconds": runtime})
+
+        summary = generate_metrics_summary()
+
+        assert list(metrics._agg["runs"]["runtimes"]) == [1.0, 3.0]
+        assert summary["run_count"] == 3
+        assert summary["runtime_p50"] == pytest.approx(2.0)
+
+
+def test_summarize_run_metrics_counts_reasons():
+    from core.metrics import summarize_run_metrics
+
+    summary = summarize_run_metrics(
+        [
+            {"event_type": "run_completed", "metadata": {"degraded_reasons": ["timeout", 3], "fixes_attempted": "2"}},
+            {"event_type": "run_completed", "metadata": {"degraded_reasons": ["timeout"], "failure_reason": "x"}},
+            {"event_type": "run_completed", "metadata": None},
+            {"event_type": "pr_processed", "metadata": {"failure_reason": "ignored"}},
+        ]
+    )
+
+    assert summary["run_count"] == 3
+    assert summary["fixes_attempted"] == 2
+    assert summary["degraded_to_warn_count"] == 2
+    assert summary["degraded_reasons"] == {"timeout": 2, "3": 1}
+    assert type(summary["degraded_reasons"]) is dict
+    assert summary["failure_reasons"] == {"x": 1}
+
+
+def test_record_metric_tolerates_missing_counts():
+    record_metric("pr_processed", "o/a", violations_found=None, violations_fixed=None)
+
+    summary = generate_metrics_summary()
+
+    assert summary["total_violations_found"] == 0
+    assert summary["fix_rate"] == 0
+
+
+def test_record_metric_emits_one_audit_event(monkeypatch):
+    from core import metrics, observability
+
+    audits = []
+    monkeypatch.setattr(metrics, "log_audit_event", lambda *a, **kw: audits.append((a, kw)))
+    monkeypatch.setattr(observability, "log_audit_event", lambda *a, **kw: audits.append((a, kw)))
+
+    record_metric("pr_processed", "o/a", pr_number=3, violations_found=1, correlation_id="cid")
+
+    ((args, kwargs),) = audits
+    assert args == ("metric_recorded", "success")
+    assert kwargs["correlation_id"] == "cid"
+    assert kwargs["repo"] == "o/a"
+    assert kwargs["pr_number"] == 3
+    assert kwargs["metadata"]["event_type"] == "pr_processed"
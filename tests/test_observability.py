@@ -0,0 +1,182 @@
+"""
+Tests for core/observability.py - structured audit logging.
+"""
+from __future__ import annotations
+
+import json
+import logging
+
+import pytest
+
+import core.observability as observability
+from core.observability import log_audit_event
+
+
+@pytest.fixture(autouse=True)
+def _no_audit_db(monkeypatch):
+    monkeypatch.setenv("RAILO_AUDIT_LOG_DB", "0")
+
+
+def _audit_lines(caplog) -> list[dict]:
+    return [
+        json.loads(r.getMessage())
+        for r in caplog.records
+        if r.name == "core.observability" and r.getMessage().startswith("{")
+    ]
+
+
+class TestAuditEvent:
+    """Tests for the JSON audit line."""
+
+    def test_line_is_redacted_json(self, caplog):
+        with caplog.at_level(logging.INFO, logger="core.observability"):
+            log_audit_event(
+                "fix_applied",
+                "success",
+                correlation_id="cid-1",
+                repo="o/r",
+                metadata={"github_token": "ghs_x", "nested": {"Authorization": "Bearer y"}, "count": 2},
+            )
+
+        (event,) = _audit_lines(caplog)
+        assert event["action"] == "fix_applied"
+        assert event["correlation_id"] == "cid-1"
+        assert event["metadata"] == {
+            "github_token": "[REDACTED]",
+            "nested": {"Authorization": "[REDACTED]"},
+            "count": 2,
+        }
+
+    def test_stdlib_fallback(self, monkeypatch):
+        monkeypatch.setattr(observability, "orjson", None)
+        encoded = observability._dumps({"b": 1, "a": ["é"]})
+        assert encoded == '{"b":1,"a":["é"]}'
+
+    def test_unencodable_value_falls_back(self):
+        assert json.loads(observability._dumps({"n": 2**70})) == {"n": 2**70}
+
+
+@pytest.mark.parametrize(
+    "key, redacted",
+    [
+        ("private_key", True),
+        ("X-Api-Token", True),
+        ("db_password", True),
+        ("client_secrets", True),
+        ("Authorization", True),
+        ("author", False),
+        ("repo", False),
+    ],
+)
+def test_redact_key_matching(key, redacted):
+    result = observability._redact({key: "value", "items": [{key: "value"}]})
+    expected = "[REDACTED]" if redacted else "value"
+    assert result[key] == expected
+    assert result["items"][0][key] == expected
+
+
+class TestProcessingResult:
+    """Tests for log_processing_result."""
+
+    def test_message_formatted_lazily(self, caplog):
+        with caplog.at_level(logging.INFO, logger="core.observability"):
+            observability.log_processing_result("cid", "success", "done", {"repo": "o/r"})
+
+        (record,) = [r for r in caplog.records if r.getMessage().startswith("Processing")]
+        assert record.getMessage() == "Processing succeeded: done"
+        assert record.repo == "o/r"
+        assert record.detail == "done"
+
+    def test_reserved_metadata_keys_renamed(self, caplog):
+        with caplog.at_level(logging.INFO, logger="core.observability"):
+            observability.log_processing_result(
+                "cid", "success", "done", {"message": "m", "msg": "x", "name": "n", "filename": "f"}
+            )
+
+        (record,) = [r for r in caplog.records if r.getMessage().startswith("Processing")]
+        assert record.detail == "m"
+        assert record.meta_msg == "x"
+        assert record.meta_name == "n"
+        assert record.meta_filename == "f"
+
+    def test_audit_emitted_when_info_disabled(self, monkeypatch):
+        events = []
+        monkeypatch.setattr(observability, "log_audit_event", lambda *a, **kw: events.append((a, kw)))
+        monkeypatch.setattr(observability.logger, "isEnabledFor", lambda level: False)
+
+        observability.log_processing_result("cid", "warn_mode", "x", {"repo": "o/r", "pr_number": "5"})
+
+        ((args, kwargs),) = events
+        assert kwargs["repo"] == "o/r"
+        assert kwargs["pr_number"] == 5
+
+
+class TestCorrelationContext:
+    """Tests for correlation ID scoping."""
+
+    def _current(self) -> str:
+        record = logging.makeLogRecord({})
+        observability.CorrelationIDFilter().filter(record)
+        return record.correlation_id
+
+    def test_nested_contexts_restore(self):
+        assert self._current() == "no-id"
+        with observability.CorrelationContext("outer"):
+            with observability.CorrelationContext("inner"):
+                assert self._current() == "inner"
+            assert self._current() == "outer"
+        assert self._current() == "no-id"
+
+    def test_threads_do_not_share_ids(self):
+        import threading
+
+        seen = []
+        entered = threading.Event()
+        release = threading.Event()
+
+        def _worker():
+            with observability.CorrelationContext("worker"):
+                entered.set()
+                release.wait(5)
+                seen.append(self._current())
+
+        t = threading.Thread(target=_worker)
+        t.start()
+        entered.wait(5)
+        with observability.CorrelationContext("main"):
+            release.set()
+            t.join(5)
+            assert self._current() == "main"
+        assert seen == ["worker"]
+
+
+def test_db_row_reuses_logged_metadata(caplog, monkeypatch):
+    import core.db
+
+    rows = []
+    monkeypatch.setenv("RAILO_AUDIT_LOG_DB", "1")
+    monkeypatch.setattr(core.db, "queue_audit_log", lambda **kw: rows.append(kw))
+
+    with caplog.at_level(logging.INFO, logger="core.observability"):
+        log_audit_event("scan", "ok", repo="o/r", metadata={"password": "p", "files": ["a.py"]})
+
+    (event,) = _audit_lines(caplog)
+    (row,) = rows
+    assert json.loads(row["metadata_json"]) == event["metadata"] == {"password": "[REDACTED]", "files": ["a.py"]}
+    assert row["timestamp"] == event["timestamp"]
+
+
+def test_audit_db_flag_read_per_call(monkeypatch):
+    import core.db
+
+    rows = []
+    monkeypatch.setattr(core.db, "queue_audit_log", lambda **kw: rows.append(kw))
+
+    monkeypatch.setenv("RAILO_AUDIT_LOG_DB", "1")
+    log_audit_event("scan", "ok")
+    monkeypatch.setenv("RAILO_AUDIT_LOG_DB", "false")
+    log_audit_event("scan", "ok")
+    monkeypatch.setenv("RAILO_AUDIT_LOG_DB", "yes")
+    log_audit_event("scan", "ok")
+
+    assert len(rows) == 2
@@ -0,0 +1,44 @@
+"""
+Tests for core/patch_plan.py - pre-fix patch planning.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+from core.patch_plan import generate_patch_plan
+
+
+def _finding(path: str, check_id: str = "python.sqli") -> dict:
+    return {"path": path, "check_id": check_id}
+
+
+class TestGeneratePatchPlan:
+    """Tests for generate_patch_plan."""
+
+    def test_files_and_rules_deduplicated_and_sorted(self, temp_repo):
+        findings = [
+            _finding(str(temp_repo / "b.py"), "r2"),
+            _finding("a.py", "r1"),
+            _finding(str(temp_repo / "b.py"), "r1"),
+            _finding("a.py", "r2"),
+        ]
+
+        plan = generate_patch_plan(temp_repo, findings, Path("rules"))
+
+        assert plan.target_files == ["a.py", "b.py"]
+        assert plan.changed_files == ["a.py", "b.py"]
+        assert plan.rules == ["r1", "r2"]
+        assert plan.findings_count == 4
+
+    def test_absolute_path_outside_repo_uses_name(self, temp_repo, tmp_path):
+        outside = tmp_path / "elsewhere" / "x.py"
+
+        plan = generate_patch_plan(temp_repo, [_finding(str(outside))], Path("rules"))
+
+        assert plan.target_files == ["x.py"]
+
+    def test_findings_without_path_skipped(self, temp_repo):
+        plan = generate_patch_plan(temp_repo, [{"check_id": "r1"}, _finding("src/app.py")], Path("rules"))
+
+        assert plan.target_files == [str(Path("src/app.py"))]
+        assert plan.rules == ["python.sqli"]
@@ -0,0 +1,251 @@
+"""
+Tests for core/pr_comments.py - posting comments through PyGithub.
+"""
+from __future__ import annotations
+
+import sys
+import types
+
+import pytest
+
+import core.pr_comments as pr_comments
+
+
+_FINDING = {"path": "app.py", "start": {"line": 3}, "check_id": "python.sqli"}
+
+
+class _FakeComment:
+    def __init__(self, body: str):
+        self.body = body
+        self.edited = None
+
+
+class _FakeRequester:
+    """Stands in for the client's requester, serving the comment endpoints."""
+
+    def __init__(self):
+        self.existing: list[_FakeComment] = []
+        self.posted: list[str] = []
+        self.post_urls: list[tuple] = []
+        self.queries: list[dict] = []
+        self.rest_urls: list[str] = []
+        self.graphql_error = False
+
+    def requestJsonAndCheck(self, verb, url, parameters=None, input=None):
+        if verb == "POST" and url.endswith("/comments"):
+            self.posted.append(input["body"])
+            self.post_urls.append((verb, url))
+            return {}, {"html_url": "https://github.com/o/r/pull/1#issuecomment-2"}
+        if verb == "PATCH":
+            comment_id = int(url.rsplit("/", 1)[1])
+            self.existing[comment_id - 1].edited = input["body"]
+            return {}, {"html_url": f"https://github.com/o/r/pull/1#issuecomment-{comment_id}"}
+        if verb == "GET":
+            self.rest_urls.append(url)
+            items = [{"id": i, "body": c.body} for i, c in enumerate(self.existing, 1)]
+            if url.endswith("?page=last"):
+                return {}, items[100:]
+            link = '<https://api.github.com/x?page=last>; rel="last"' if len(items) > 100 else ""
+            return {"link": link}, items[:100]
+        self.queries.append(input)
+        if self.graphql_error:
+            raise RuntimeError("graphql unavailable")
+        nodes = [{"databaseId": i, "body": c.body} for i, c in enumerate(self.existing, 1)]
+        return {}, {"data": {"repository": {"pullRequest": {"comments": {"nodes": nodes[-20:]}}}}}
+
+
+@pytest.fixture
+def fake_github(monkeypatch):
+    """Install a fake ``github`` module and record the clients created."""
+    calls: list[tuple] = []
+    requester = _FakeRequester()
+
+    class _Github:
+        def __init__(self, auth=None, **kwargs):
+            calls.append(("client", auth))
+            self.requester = requester
+
+    module = types.ModuleType("github")
+    module.Github = _Github
+    module.Auth = types.SimpleNamespace(Token=lambda token: token)
+    monkeypatch.setitem(sys.modules, "github", module)
+    pr_comments._github_client.cache_clear()
+    yield calls, requester
+    pr_comments._github_client.cache_clear()
+
+
+class TestHandleCaching:
+    """Tests for reusing the client across comment posts."""
+
+    def test_comments_post_without_repo_or_pull_lookup(self, fake_github):
+        calls, requester = fake_github
+
+        url = pr_comments.create_fix_comment("o", "r", 1, ["a.py"], [], token="t1")
+        pr_comments.create_warn_comment("o", "r", 1, [_FINDING], [], token="t1")
+
+        assert url == "https://github.com/o/r/pull/1#issuecomment-2"
+
+        assert calls == [("client", "t1")]
+        assert len(requester.posted) == 2
+        assert requester.post_urls == [("POST", "/repos/o/r/issues/1/comments")] * 2
+
+    def test_nothing_to_report_skips_api(self, fake_github):
+        calls, _ = fake_github
+
+        assert pr_comments.create_fix_comment("o", "r", 1, [], [], token="t1") == ""
+        assert pr_comments.create_warn_comment("o", "r", 1, [], [], head_sha="abc", token="t1") == ""
+
+        assert calls == []
+
+    def test_new_token_gets_new_client(self, fake_github):
+        calls, _ = fake_github
+
+        pr_comments.create_fix_comment("o", "r", 1, ["a.py"], [], token="t1")
+        pr_comments.create_fix_comment("o", "r", 1, ["a.py"], [], token="t2")
+
+        assert calls == [("client", "t1"), ("client", "t2")]
+
+
+class TestWarnCommentIdempotency:
+    """Tests for finding the warn comment already posted for a commit."""
+
+    def _existing(self, requester, *bodies):
+        requester.existing[:] = [_FakeComment(b) for b in bodies]
+
+    def test_marker_found_with_one_query(self, fake_github):
+        _, requester = fake_github
+        self._existing(requester, "unrelated", "<!-- railo:sha=abcdef12 -->\nold body")
+
+        url = pr_comments.create_warn_comment("o", "r", 1, [_FINDING], [], head_sha="abcdef1234", token="t")
+
+        assert len(requester.queries) == 1
+        assert requester.queries[0]["variables"] == {"owner": "o", "name": "r", "number": 1, "last": 20}
+        assert requester.rest_urls == []
+        assert requester.posted == []
+        assert url == "https://github.com/o/r/pull/1#issuecomment-2"
+        assert requester.existing[1].edited.startswith("<!-- railo:sha=abcdef12 -->\n## ")
+
+    def test_legacy_comment_without_marker_matches(self, fake_github):
+        _, requester = fake_github
+        self._existing(requester, "Railo found issues\n*Commit: `abcdef12`*")
+
+        pr_comments.create_warn_comment("o", "r", 1, [_FINDING], [], head_sha="abcdef1234", token="t")
+
+        assert requester.existing[0].edited is not None
+
+    def test_new_commit_posts_new_comment(self, fake_github):
+        _, requester = fake_github
+        self._existing(requester, "<!-- railo:sha=00000000 -->\nold body")
+
+        pr_comments.create_warn_comment("o", "r", 1, [_FINDING], [], head_sha="abcdef1234", token="t")
+
+        assert requester.existing[0].edited is None
+        assert len(requester.posted) == 1
+
+    def test_graphql_failure_falls_back_to_rest(self, fake_github):
+        _, requester = fake_github
+        self._existing(requester, "<!-- railo:sha=abcdef12 -->\nold body")
+        requester.graphql_error = True
+
+        pr_comments.create_warn_comment("o", "r", 1, [_FINDING], [], head_sha="abcdef1234", token="t")
+
+        assert requester.rest_urls == ["/repos/o/r/issues/1/comments"]
+        assert requester.existing[0].edited is not None
+
+    def test_rest_fallback_checks_only_recent_comments(self, fake_github):
+        _, requester = fake_github
+        self._existing(requester, "<!-- railo:sha=abcdef12 -->\nold body", *["chatter"] * 25)
+        requester.graphql_error = True
+
+        pr_comments.create_warn_comment("o", "r", 1, [_FINDING], [], head_sha="abcdef1234", token="t")
+
+        assert requester.existing[0].edited is None
+        assert len(requester.posted) == 1
+
+    def test_rest_fallback_reads_last_page(self, fake_github):
+        _, requester = fake_github
+        self._existing(requester, *["chatter"] * 105, "<!-- railo:sha=abcdef12 -->\nold body")
+        requester.graphql_error = True
+
+        pr_comments.create_warn_comment("o", "r", 1, [_FINDING], [], head_sha="abcdef1234", token="t")
+
+        assert requester.rest_urls == ["/repos/o/r/issues/1/comments", "https://api.github.com/x?page=last"]
+        assert requester.existing[105].edited is not None
+        assert requester.posted == []
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("a_b*c", "a\\_b\\*c"),
+        ("<b>bold</b> [x](y)", "bold \\[x\\]\\(y\\)"),
+        ("back\\slash", "back\\\\slash"),
+        ("plain words", "plain words"),
+        ("x" * 600, "x" * 497 + "..."),
+        ("", ""),
+    ],
+)
+def test_sanitize_for_markdown(text, expected):
+    assert pr_comments._sanitize_for_markdown(text) == expected
+
+
+def test_findings_table_rows():
+    table = pr_comments._findings_table(
+        [
+            {"path": "app.py", "start": {"line": 4}, "check_id": "python.sqli", "extra": {"metadata": {"confidence": "HIGH"}}},
+            {"path": "ui.js", "check_id": "js.xss"},
+        ]
+    )
+
+    assert table.splitlines() == [
+        "| File | Issue | Line | Confidence |",
+        "|------|-------|------|-----------|",
+        "| `app.py` | SQL Injection | 4 | 90% |",
+        "| `ui.js` | XSS |  | — |",
+    ]
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("src/app.py", "src/app.py"),
+        ("../../etc/passwd", "//etc/passwd"),
+        ("a\x00b.py", "ab.py"),
+        (".\x00./secret", "/secret"),
+        (".../x", "/x"),
+        ("a.\x00..b", "ab"),
+        ("d/" * 150, "..." + ("d/" * 150)[-197:]),
+    ],
+)
+def test_sanitize_file_path(path, expected):
+    assert pr_comments._sanitize_file_path(path) == expected
+
+
+def test_sanitize_code_block():
+    assert pr_comments._sanitize_code_block("x = 1") == "x = 1"
+    assert pr_comments._sanitize_code_block("```\nrm -rf\n```") == "'''\nrm -rf\n'''"
+    assert pr_comments._sanitize_code_block("y" * 50, max_length=30) == "y" * 10 + "\n... (truncated)"
+
+
+def test_warn_fix_confidence_falls_back_to_first_finding_for_path(fake_github):
+    _, requester = fake_github
+    findings = [
+        {"path": "views.py", "check_id": "sqli", "extra": {"metadata": {"confidence": "HIGH"}}},
+        {"path": "views.py", "check_id": "sqli", "extra": {"metadata": {"confidence": "LOW"}}},
+        {"path": "other.py", "check_id": "xss"},
+    ]
+    fixes = [
+        {"file": "views.py", "line": 3, "before": "a", "after": "b", "check_id": "sqli"},
+        {"file": "other.py", "line": 4, "before": "a", "after": "b", "check_id": "xss"},
+        {"file": "views.py", "line": 5, "before": "a", "after": "b", "check_id": "sqli", "confidence": 50},
+    ]
+
+    pr_comments.create_warn_comment("o", "r", 1, findings, fixes, token="t")
+
+    (body,) = requester.posted
+    headers = [line for line in body.splitlines() if line.startswith("**SQL") or line.startswith("**XSS")]
+    assert headers == [
+        f"**SQL Injection** · `views.py` line 3 — confidence {pr_comments._confidence_bar(90.0)}",
+        "**XSS** · `other.py` line 4",
+        f"**SQL Injection** · `views.py` line 5 — confidence {pr_comments._confidence_bar(50.0)}",
+    ]
@@ -0,0 +1,79 @@
+"""
+Tests for core/rate_limit.py - in-memory token bucket.
+"""
+from __future__ import annotations
+
+import threading
+import types
+
+import pytest
+
+from core import rate_limit
+from core.rate_limit import check_rate_limit, reset_rate_limit
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Memory-only limiter with a controllable clock."""
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit, "get_redis_client", lambda: None)
+    monkeypatch.setattr(rate_limit, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    reset_rate_limit("k")
+    yield now
+    reset_rate_limit("k")
+
+
+class TestInMemoryWindow:
+    """Tests for check_rate_limit without Redis."""
+
+    def test_limit_and_remaining(self, clock):
+        results = [check_rate_limit("k", max_requests=3, window_seconds=60) for _ in range(4)]
+        assert results == [(True, 2), (True, 1), (True, 0), (False, 0)]
+
+    def test_tokens_refill_over_the_window(self, clock):
+        for _ in range(2):
+            check_rate_limit("k", max_requests=2, window_seconds=60)
+        assert check_rate_limit("k", max_requests=2, window_seconds=60) == (False, 0)
+
+        clock[0] += 30  # half a window refills one token
+        assert check_rate_limit("k", max_requests=2, window_seconds=60) == (True, 0)
+        assert check_rate_limit("k", max_requests=2, window_seconds=60) == (False, 0)
+
+    def test_idle_bucket_caps_at_max(self, clock):
+        check_rate_limit("k", max_requests=3, window_seconds=60)
+        clock[0] += 3600
+
+        assert check_rate_limit("k", max_requests=3, window_seconds=60) == (True, 2)
+        tokens, last = rate_limit._rate_limit_store["k"]
+        assert (tokens, last) == (2.0, clock[0])
+
+    def test_concurrent_requests_never_share_a_token(self, clock):
+        allowed = []
+        start = threading.Barrier(8)
+
+        def _hammer():
+            start.wait()
+            for _ in range(50):
+                allowed.append(check_rate_limit("k", max_requests=100, window_seconds=60)[0])
+
+        threads = [threading.Thread(target=_hammer) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert allowed.count(True) == 100
+
+
+def test_idle_buckets_swept(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit, "_last_gc", clock[0])
+    monkeypatch.setattr(rate_limit, "_longest_window", 0.0)
+    monkeypatch.setattr(rate_limit, "_rate_limit_store", {})
+    check_rate_limit("old", max_requests=3, window_seconds=60)
+    clock[0] += 250
+    check_rate_limit("recent", max_requests=3, window_seconds=60)
+
+    clock[0] += 51  # past the sweep interval; "old" idle for 301s, "recent" for 51s
+    check_rate_limit("k", max_requests=3, window_seconds=60)
+
+    assert set(rate_limit._rate_limit_store) == {"recent", "k"}
@@ -0,0 +1,106 @@
+"""
+Tests for core/safety.py checks that run against a local git repo.
+"""
+from __future__ import annotations
+
+import subprocess
+
+import pytest
+
+from core.safety import analyze_diff_quality, compute_fix_idempotency_key
+
+
+def _git(repo, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def git_repo(temp_repo):
+    """A repo with one committed Python file."""
+    _git(temp_repo, "init", "-q")
+    (temp_repo / "app.py").write_text(
+        "import os\nimport sys\n\n\ndef run(cmd):\n    return os.system(cmd)\n",
+        encoding="utf-8",
+    )
+    _git(temp_repo, "add", ".")
+    _git(temp_repo, "commit", "-q", "-m", "init")
+    return temp_repo
+
+
+_FINDING = {"path": "app.py", "start": {"line": 6}, "check_id": "python.command-injection"}
+
+
+class TestIdempotencyKey:
+    """Tests for the per-finding fix dedup key."""
+
+    def test_same_inputs_same_key(self):
+        key = compute_fix_idempotency_key(1, "abc", _FINDING)
+
+        assert key == compute_fix_idempotency_key(1, "abc", dict(_FINDING))
+        assert len(key) == 32
+
+    @pytest.mark.parametrize(
+        "pr_number, head_sha, finding",
+        [
+            (2, "abc", _FINDING),
+            (1, "abd", _FINDING),
+            (1, "abc", {**_FINDING, "path": "other.py"}),
+            (1, "abc", {**_FINDING, "start": {"line": 7}}),
+            (1, "abc", {**_FINDING, "check_id": "python.sqli"}),
+            (1, "abc", {"path": "app.py6"}),
+        ],
+    )
+    def test_each_field_changes_key(self, pr_number, head_sha, finding):
+        assert compute_fix_idempotency_key(pr_number, head_sha, finding) != compute_fix_idempotency_key(1, "abc", _FINDING)
+
+
+class TestAnalyzeDiffQuality:
+    """Tests for the minimal-patch quality check."""
+
+    def test_no_diff_is_minimal(self, git_repo):
+        assert analyze_diff_quality(git_repo) == {"quality_score": 1.0, "issues": [], "is_minimal": True}
+
+    def test_focused_fix_is_minimal(self, git_repo):
+        (git_repo / "app.py").write_text(
+            "import os\nimport sys\n\n\ndef run(cmd):\n    return subprocess.run(cmd, shell=False)\n",
+            encoding="utf-8",
+        )
+
+        result = analyze_diff_quality(git_repo)
+
+        assert result["is_minimal"] is True
+        assert result["issues"] == []
+
+    def test_import_reordering_flagged(self, git_repo):
+        (git_repo / "app.py").write_text(
+            "import sys\nimport os\n\n\ndef run(cmd):\n    return os.system(cmd)\n",
+            encoding="utf-8",
+        )
+
+        result = analyze_diff_quality(git_repo)
+
+        assert result["is_minimal"] is False
+        assert any("Import reordering" in issue for issue in result["issues"])
+
+    def test_large_added_block_flagged(self, git_repo):
+        with (git_repo / "app.py").open("a", encoding="utf-8") as f:
+            f.write("".join(f"x{i} = {i}\n" for i in range(25)))
+
+        result = analyze_diff_quality(git_repo)
+
+        assert "Large consecutive change block (25 lines)" in result["issues"][0]
+        assert result["is_minimal"] is False
+
+    def test_class_definition_flagged(self, git_repo):
+        with (git_repo / "app.py").open("a", encoding="utf-8") as f:
+            f.write("class Runner:\n    pass\n")
+
+        result = analyze_diff_quality(git_repo)
+
+        assert result["issues"] == ["Class definition moved: +class Runner"]
+        assert result["quality_score"] == pytest.approx(0.9)